@@ -0,0 +1,587 @@
+#!/usr/bin/env python3
+"""
+Benchmark the pre-render pipeline and the render on synthetic projects.
+
+Builds a project of configurable size in a temp dir: N scenes mixing images
+and videos, oversized stock-like images, remote media served by a local
+stub HTTP server (Range + ETag, like a CDN), broken resources.json entries,
+transitions and a TikTokCaption track. It then times each stage in its own
+process:
+
+  repair     repair-resources.py
+  fetch      prerender_fetch.py against the stub server
+  resize     resize_images.py
+  manifest   build_manifest.py
+  render     remotion render --sequence --concurrency=1 (with --render)
+
+Prebuild stages run twice (cold, then warm) so incremental paths are covered
+too. The JSON report holds per-stage wall time, peak RSS of the whole stage
+process tree (sum over the process and its descendants, sampled from /proc
+every 100ms; null elsewhere) and peak RSS of its largest single process
+(getrusage), and for the render a per-frame time histogram with slow frames
+mapped to the clips active on them (from render-manifest.json).
+Frame times come from the completion times of the image sequence; a
+`--log=verbose` remotion log can be profiled the same way with --frame-log.
+
+Usage:
+  python3 scripts/bench_render.py --scenes 40 --video-ratio 0.3 --oversized-ratio 0.2
+  python3 scripts/bench_render.py --render --render-frames 0-299
+  python3 scripts/bench_render.py --baseline out/bench/baseline.json   # exit 1 on regressions
+  python3 scripts/bench_render.py --frame-log render.log --project my-project   # profile an existing log
+
+Images are written as PNG with zlib; videos need ffmpeg (otherwise they are
+placeholder bytes, fine for the prebuild stages but not for --render).
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from build_manifest import FPS, load_manifest
+from project_files import PROJECTS_DIR, ROOT_DIR, atomic_write_text, dump_json
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+DEFAULT_OUTPUT = ROOT_DIR / 'out' / 'bench' / 'report.json'
+REPORT_VERSION = 2
+RSS_SAMPLE_INTERVAL = 0.1
+HISTOGRAM_BUCKETS_MS = (16, 33, 66, 133, 250, 500, 1000, 2000, 5000)
+TRANSITION_FRAMES = 10
+
+_FRAME_LOG = (
+    re.compile(r'frame\D{0,12}(\d+)\D[^\n]*?(\d+(?:\.\d+)?)\s*ms', re.I),
+    re.compile(r'(\d+(?:\.\d+)?)\s*ms[^\n]*?frame\D{0,12}(\d+)', re.I),
+)
+
+
+# ─── Synthetic media ─────────────────────────────────────────────────────────
+
+def png_bytes(width, height, seed=0):
+    """An RGB PNG with horizontal bands, built with zlib only."""
+    rng = random.Random(seed)
+    compressor = zlib.compressobj(1)
+    chunks = []
+    band = max(1, height // 8)
+    row = b''
+    for y in range(height):
+        if y % band == 0:
+            color = bytes(rng.randrange(256) for _ in range(3))
+            row = b'\x00' + color * width
+        chunks.append(compressor.compress(row))
+    chunks.append(compressor.flush())
+
+    def chunk(kind, data):
+        return len(data).to_bytes(4, 'big') + kind + data + zlib.crc32(kind + data).to_bytes(4, 'big')
+
+    ihdr = width.to_bytes(4, 'big') + height.to_bytes(4, 'big') + bytes([8, 2, 0, 0, 0])
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', ihdr) + chunk(b'IDAT', b''.join(chunks)) + chunk(b'IEND', b'')
+
+
+def make_video(path, seconds, width=1280, height=720):
+    """Write a test-pattern H.264 clip with ffmpeg, or placeholder bytes. Returns True if real."""
+    if shutil.which('ffmpeg'):
+        result = subprocess.run(
+            ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-y', '-f', 'lavfi',
+             '-i', f'testsrc2=size={width}x{height}:rate={FPS}', '-t', str(seconds),
+             '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p', str(path)])
+        if result.returncode == 0:
+            return True
+    Path(path).write_bytes(os.urandom(256 * 1024))
+    return False
+
+
+# ─── Stub CDN ────────────────────────────────────────────────────────────────
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    root = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, head_only):
+        path = self.root / self.path.lstrip('/').split('?')[0]
+        if not path.is_file():
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        size = path.stat().st_size
+        etag = f'"{size:x}-{int(path.stat().st_mtime)}"'
+        start, end = 0, size - 1
+        status = 200
+        match = re.match(r'bytes=(\d+)-(\d*)$', self.headers.get('Range') or '')
+        if match and self.headers.get('If-Range') in (None, etag):
+            start = int(match.group(1))
+            end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            if start >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            status = 206
+        self.send_response(status)
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', etag)
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.end_headers()
+        if head_only:
+            return
+        with open(path, 'rb') as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                data = f.read(min(1 << 16, remaining))
+                if not data:
+                    break
+                self.wfile.write(data)
+                remaining -= len(data)
+
+    def do_GET(self):
+        self._send(False)
+
+    def do_HEAD(self):
+        self._send(True)
+
+
+def start_stub_server(root):
+    """Serve root on 127.0.0.1 in a daemon thread. Returns (server, base_url)."""
+    handler = type('StubHandler', (_StubHandler,), {'root': Path(root)})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+# ─── Synthetic project ───────────────────────────────────────────────────────
+
+def _rt(frames):
+    return {'OTIO_SCHEMA': 'RationalTime.1', 'rate': FPS, 'value': frames}
+
+
+def _range(frames):
+    return {'OTIO_SCHEMA': 'TimeRange.1', 'start_time': _rt(0), 'duration': _rt(frames)}
+
+
+def make_project(project_dir, spec, base_url, remote_dir):
+    """Write script.json, resources.json, an .otio and media. Returns media counts."""
+    rng = random.Random(spec['seed'])
+    project_dir = Path(project_dir)
+    for sub in ('images', 'videos'):
+        (project_dir / sub).mkdir(parents=True, exist_ok=True)
+    remote_dir.mkdir(parents=True, exist_ok=True)
+
+    counts = {'images': 0, 'oversizedImages': 0, 'videos': 0, 'realVideos': 0, 'remote': 0,
+              'broken': 0, 'transitions': 0, 'captions': 0, 'bytes': 0}
+    seconds = spec['scene_seconds']
+    frames = round(seconds * FPS)
+    scenes, groups, video_clips, caption_clips = [], {'videos': [], 'images': []}, [], []
+
+    for i in range(spec['scenes']):
+        scene_id = f'scene-{i + 1}'
+        is_video = rng.random() < spec['video_ratio']
+        remote = rng.random() < spec['remote_ratio']
+        name = f'bench_{i:04d}' + ('.mp4' if is_video else '.png')
+        target = (remote_dir if remote else project_dir / ('videos' if is_video else 'images')) / name
+        if is_video:
+            counts['videos'] += 1
+            counts['realVideos'] += make_video(target, seconds)
+        else:
+            counts['images'] += 1
+            oversized = rng.random() < spec['oversized_ratio']
+            counts['oversizedImages'] += oversized
+            width, height = (6000, 4000) if oversized else (1600, 900)
+            target.write_bytes(png_bytes(width, height, seed=spec['seed'] * 7919 + i))
+        counts['bytes'] += target.stat().st_size
+
+        rel = f"{'videos' if is_video else 'images'}/{name}"
+        result = {'id': f'bench-{i}', 'type': 'video' if is_video else 'image',
+                  'downloadUrl': f'{base_url}/{name}' if remote else None,
+                  'downloadUrls': {'hd': f'{base_url}/{name}'} if remote else {}}
+        if remote:
+            counts['remote'] += 1
+        else:
+            result['localPath'] = str(project_dir / rel)
+        results = [result]
+        if rng.random() < spec['broken_ratio']:
+            # rank 1 without a path or URL: repair-resources promotes the valid one
+            results.insert(0, {'id': f'broken-{i}', 'type': result['type']})
+            counts['broken'] += 1
+        groups['videos' if is_video else 'images'].append({'sceneId': scene_id, 'results': results})
+        scenes.append({'id': scene_id, 'text': f'Synthetic scene {i + 1} for benchmarking',
+                       'startTime': i * seconds, 'duration': seconds, 'selectedResourceId': result['id']})
+
+        if video_clips and rng.random() < spec['transitions']:
+            video_clips.append({'OTIO_SCHEMA': 'Transition.1', 'name': f'transition-{i}', 'transition_type': 'fade',
+                                'in_offset': _rt(TRANSITION_FRAMES // 2), 'out_offset': _rt(TRANSITION_FRAMES // 2)})
+            counts['transitions'] += 1
+        video_clips.append({
+            'OTIO_SCHEMA': 'Clip.1', 'name': scene_id, 'source_range': _range(frames),
+            'media_references': {'DEFAULT_MEDIA': {'OTIO_SCHEMA': 'ExternalReference.1',
+                                                   'target_url': f'{base_url}/{name}' if remote else rel}},
+            'active_media_reference_key': 'DEFAULT_MEDIA',
+        })
+        if spec['captions']:
+            words = scenes[-1]['text'].split()
+            step = seconds / len(words)
+            caption_clips.append({
+                'OTIO_SCHEMA': 'Clip.1', 'name': f'caption-{i + 1}', 'source_range': _range(frames),
+                'metadata': {'remotion_component': 'TikTokCaption', 'props': {
+                    'words': [{'word': w, 'start': round(k * step, 3), 'end': round((k + 1) * step, 3),
+                               'confidence': 1} for k, w in enumerate(words)],
+                    'theme': 'clean-minimal', 'position': 'bottom'}},
+                'media_references': {'DEFAULT_MEDIA': {'OTIO_SCHEMA': 'MissingReference.1'}},
+            })
+            counts['captions'] += 1
+
+    tracks = [{'OTIO_SCHEMA': 'Track.1', 'name': 'Video', 'kind': 'Video', 'children': video_clips}]
+    if caption_clips:
+        tracks.append({'OTIO_SCHEMA': 'Track.1', 'name': 'Captions', 'kind': 'Video', 'children': caption_clips})
+    timeline = {'OTIO_SCHEMA': 'Timeline.1', 'name': project_dir.name, 'metadata': {'ratio': '9:16'},
+                'tracks': {'OTIO_SCHEMA': 'Stack.1', 'children': tracks}}
+    atomic_write_text(project_dir / 'script.json', dump_json({
+        'metadata': {'projectName': project_dir.name, 'ratio': '9:16'}, 'scenes': scenes}))
+    atomic_write_text(project_dir / 'resources.json', dump_json({'resources': groups}))
+    atomic_write_text(project_dir / 'project.otio', dump_json(timeline))
+    return counts
+
+
+# ─── Measurement ─────────────────────────────────────────────────────────────
+
+def _maxrss_bytes(value):
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    return value if platform.system() == 'Darwin' else value * 1024
+
+
+def tree_rss_bytes(root_pid):
+    """Current RSS of root_pid plus all its descendants, from /proc (Linux)."""
+    procs = {}
+    for entry in os.scandir('/proc'):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry.name}/stat', 'rb') as f:
+                stat = f.read()
+        except OSError:
+            continue  # exited while scanning
+        # comm (field 2) may contain spaces and parens: fields restart after the last ')'
+        fields = stat[stat.rindex(b')') + 2:].split()
+        procs[int(entry.name)] = (int(fields[1]), int(fields[21]))  # ppid, rss in pages
+    children = {}
+    for pid, (ppid, _) in procs.items():
+        children.setdefault(ppid, []).append(pid)
+    total = 0
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        if pid in procs:
+            total += procs[pid][1]
+            stack.extend(children.get(pid, ()))
+    return total * os.sysconf('SC_PAGE_SIZE')
+
+
+def _sample_tree_rss(root_pid, stop, peak):
+    while not stop.wait(RSS_SAMPLE_INTERVAL):
+        peak[0] = max(peak[0], tree_rss_bytes(root_pid))
+
+
+def run_stage(name, command, log_path, cwd=ROOT_DIR, env=None):
+    """Run one stage as a child process; wall time and peak RSS of its tree.
+
+    peakTreeRssBytes is the largest sampled sum over the whole tree (what a
+    render with several Chromium processes really needs); peakProcessRssBytes
+    is ru_maxrss, the peak of the single largest process.
+    """
+    started = time.monotonic()
+    peak = [0]
+    stop = threading.Event()
+    with open(log_path, 'w', encoding='utf-8') as log:
+        process = subprocess.Popen(command, cwd=cwd, stdout=log, stderr=subprocess.STDOUT, env=env)
+        sampler = None
+        if os.path.exists(f'/proc/{process.pid}/stat'):
+            sampler = threading.Thread(target=_sample_tree_rss, args=(process.pid, stop, peak), daemon=True)
+            sampler.start()
+        _, status, usage = os.wait4(process.pid, 0)
+        stop.set()
+        if sampler is not None:
+            sampler.join()
+    process.returncode = os.waitstatus_to_exitcode(status)
+    process_rss = _maxrss_bytes(usage.ru_maxrss)
+    return {'stage': name, 'seconds': round(time.monotonic() - started, 3),
+            'peakTreeRssBytes': max(peak[0], process_rss) if sampler is not None else None,
+            'peakProcessRssBytes': process_rss, 'exitCode': process.returncode, 'log': str(log_path)}
+
+
+def frame_times_from_sequence(frames_dir, started):
+    """Per-frame render time (ms) from image sequence completion times.
+
+    With --concurrency=1 frames finish in order, so the gap between two
+    files is the time spent on the later frame. The first frame also pays
+    for browser startup and is reported separately.
+    Returns (times, startup_seconds).
+    """
+    finished = {}
+    for path in Path(frames_dir).iterdir():
+        match = re.search(r'(\d+)\.(jpe?g|png)$', path.name)
+        if match:
+            finished[int(match.group(1))] = path.stat().st_mtime
+    if not finished:
+        return {}, None
+    order = sorted(finished)
+    times = {frame: round((finished[frame] - finished[prev]) * 1000, 1) for prev, frame in zip(order, order[1:])}
+    return times, round(finished[order[0]] - started, 3)
+
+
+def parse_frame_log(path):
+    """Per-frame times (ms) from a remotion --log=verbose output, best effort."""
+    times = {}
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            match = _FRAME_LOG[0].search(line)
+            if match:
+                times[int(match.group(1))] = float(match.group(2))
+                continue
+            match = _FRAME_LOG[1].search(line)
+            if match:
+                times[int(match.group(2))] = float(match.group(1))
+    return times
+
+
+def histogram(times):
+    values = sorted(times.values())
+    if not values:
+        return {'frames': 0}
+    buckets = {}
+    lower = 0
+    for upper in HISTOGRAM_BUCKETS_MS + (None,):
+        label = f'{lower}-{upper}ms' if upper else f'{lower}ms+'
+        buckets[label] = sum(1 for v in values if v >= lower and (upper is None or v < upper))
+        lower = upper
+
+    def percentile(p):
+        return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+    return {'frames': len(values), 'meanMs': round(statistics.fmean(values), 1), 'p50Ms': percentile(50),
+            'p90Ms': percentile(90), 'p99Ms': percentile(99), 'maxMs': values[-1], 'buckets': buckets}
+
+
+def slow_frames(times, clips, factor, min_ms, limit=50):
+    """Frames slower than max(factor × median, min_ms) with the clips on screen."""
+    if not times:
+        return []
+    threshold = max(factor * statistics.median(times.values()), min_ms)
+    slow = sorted(((ms, frame) for frame, ms in times.items() if ms >= threshold), reverse=True)[:limit]
+    report = []
+    for ms, frame in slow:
+        active = [{'track': c['trackName'], 'clip': c['name'], 'src': c['src'], 'component': c['component']}
+                  for c in clips if c['startFrame'] <= frame < c['startFrame'] + c['durationFrames']]
+        report.append({'frame': frame, 'ms': ms, 'clips': active})
+    return report
+
+
+def profile(times, manifest, factor, min_ms):
+    clips = (manifest or {}).get('clips') or []
+    return {'histogram': histogram(times), 'slowFrames': slow_frames(times, clips, factor, min_ms)}
+
+
+# ─── Render ──────────────────────────────────────────────────────────────────
+
+def render_stage(project_dir, work_dir, composition, frames, log_dir):
+    """Render the project as an image sequence and time each frame.
+
+    The project is linked into public/projects for the duration of the
+    render, and rendered from a minimal public dir (render_bundle.py).
+    """
+    from render_bundle import build_bundle
+
+    link = PROJECTS_DIR / project_dir.name
+    PROJECTS_DIR.mkdir(parents=True, exist_ok=True)
+    if link.exists() or link.is_symlink():
+        raise FileExistsError(f'{link} already exists')
+    link.symlink_to(project_dir, target_is_directory=True)
+    try:
+        subprocess.run(['node', str(SCRIPTS_DIR / 'generate-project-list.js')], cwd=ROOT_DIR, check=True,
+                       stdout=subprocess.DEVNULL)
+        public = work_dir / 'public'
+        build_bundle(link, public)
+        sequence = work_dir / 'frames'
+        sequence.mkdir(parents=True, exist_ok=True)
+        command = ['npx', 'remotion', 'render', composition, str(sequence), '--sequence',
+                   '--image-format=jpeg', '--concurrency=1', '--log=verbose', '--public-dir', str(public),
+                   '--props', json.dumps({'projectId': project_dir.name, 'useRenderManifest': True})]
+        if frames:
+            command.append(f'--frames={frames}')
+        started = time.time()
+        result = run_stage('render', command, log_dir / 'render.log')
+        times, startup = frame_times_from_sequence(sequence, started)
+        result['startupSeconds'] = startup
+        return result, times
+    finally:
+        link.unlink()
+        subprocess.run(['node', str(SCRIPTS_DIR / 'generate-project-list.js')], cwd=ROOT_DIR,
+                       stdout=subprocess.DEVNULL)
+
+
+# ─── Report ──────────────────────────────────────────────────────────────────
+
+def environment():
+    try:
+        from PIL import Image  # noqa: F401 (presence only)
+        pillow = True
+    except ImportError:
+        pillow = False
+    try:
+        ram = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        ram = None
+    return {'python': platform.python_version(), 'platform': f'{platform.system()}/{platform.machine()}',
+            'cpus': os.cpu_count(), 'ramBytes': ram, 'pillow': pillow,
+            'ffmpeg': bool(shutil.which('ffmpeg')), 'node': bool(shutil.which('node'))}
+
+
+def compare(report, baseline, tolerance):
+    """Stage or frame timings that got slower than baseline × (1 + tolerance)."""
+    regressions = []
+    old_stages = {(s['stage'], s.get('pass')): s for s in baseline.get('stages', [])}
+    for stage in report['stages']:
+        old = old_stages.get((stage['stage'], stage.get('pass')))
+        # ignore sub-100ms stages: process startup noise dominates
+        if old and stage['seconds'] > max(0.1, old['seconds'] * (1 + tolerance)):
+            regressions.append(f"{stage['stage']} ({stage.get('pass')}): {old['seconds']}s → {stage['seconds']}s")
+    new_hist = (report.get('render') or {}).get('histogram') or {}
+    old_hist = (baseline.get('render') or {}).get('histogram') or {}
+    for key in ('p90Ms', 'p99Ms', 'maxMs'):
+        if key in new_hist and key in old_hist and new_hist[key] > old_hist[key] * (1 + tolerance):
+            regressions.append(f'render {key}: {old_hist[key]} → {new_hist[key]}')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark prebuild stages and render on synthetic projects.')
+    parser.add_argument('--scenes', type=int, default=20)
+    parser.add_argument('--scene-seconds', type=float, default=3.0)
+    parser.add_argument('--video-ratio', type=float, default=0.3, help='share of video clips')
+    parser.add_argument('--oversized-ratio', type=float, default=0.2, help='share of 6000×4000 images')
+    parser.add_argument('--remote-ratio', type=float, default=0.5, help='share of media served by the stub')
+    parser.add_argument('--broken-ratio', type=float, default=0.1, help='share of scenes needing repair')
+    parser.add_argument('--transitions', type=float, default=0.5, help='share of cuts with a fade')
+    parser.add_argument('--no-captions', action='store_true')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--render', action='store_true', help='also render (needs node_modules and ffmpeg)')
+    parser.add_argument('--render-frames', help='frame range for the render, e.g. 0-299')
+    parser.add_argument('--composition', default='Preview-Portrait')
+    parser.add_argument('--slow-factor', type=float, default=5.0, help='slow frame = factor × median ...')
+    parser.add_argument('--slow-ms', type=float, default=500.0, help='... and at least this many ms')
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT))
+    parser.add_argument('--keep', action='store_true', help='keep the synthetic project dir')
+    parser.add_argument('--baseline', help='previous report; exit 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown vs. baseline')
+    parser.add_argument('--frame-log', help='only profile this remotion verbose log')
+    parser.add_argument('--project', help='project id whose manifest maps frames to clips (with --frame-log)')
+    parser.add_argument('--projects-dir', default=str(PROJECTS_DIR))
+    args = parser.parse_args(argv)
+
+    if args.frame_log:
+        manifest = load_manifest(Path(args.projects_dir) / args.project) if args.project else None
+        times = parse_frame_log(args.frame_log)
+        result = profile(times, manifest, args.slow_factor, args.slow_ms)
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        return 0 if times else 1
+
+    spec = {'scenes': args.scenes, 'scene_seconds': args.scene_seconds, 'video_ratio': args.video_ratio,
+            'oversized_ratio': args.oversized_ratio, 'remote_ratio': args.remote_ratio,
+            'broken_ratio': args.broken_ratio, 'transitions': args.transitions,
+            'captions': not args.no_captions, 'seed': args.seed}
+    work_dir = Path(tempfile.mkdtemp(prefix='vibedio-bench-'))
+    # same layout as the repo, so absolute localPaths contain public/projects/<id>
+    projects_dir = work_dir / 'public' / 'projects'
+    project_dir = projects_dir / f'bench-{args.scenes}s-{args.seed}'
+    logs = work_dir / 'logs'
+    logs.mkdir(parents=True)
+    server, base_url = start_stub_server(work_dir / 'cdn')
+
+    try:
+        started = time.monotonic()
+        counts = make_project(project_dir, spec, base_url, work_dir / 'cdn')
+        print(f"🧪 {project_dir.name}: {args.scenes} scenes, {counts['images']} images "
+              f"({counts['oversizedImages']} oversized), {counts['videos']} videos, {counts['remote']} remote "
+              f'in {time.monotonic() - started:.1f}s')
+
+        python = sys.executable
+        common = ['--projects-dir', str(projects_dir), project_dir.name]
+        stages = [
+            ('repair', [python, str(SCRIPTS_DIR / 'repair-resources.py'), '--no-cache', '-j', '1', *common]),
+            ('fetch', [python, str(SCRIPTS_DIR / 'prerender_fetch.py'), '--no-cache', '--backoff', '0.1', *common]),
+            ('resize', [python, str(SCRIPTS_DIR / 'resize_images.py'), *common]),
+            ('manifest', [python, str(SCRIPTS_DIR / 'build_manifest.py'), *common]),
+        ]
+        results = []
+        for run in ('cold', 'warm'):
+            for name, command in stages:
+                result = run_stage(name, command, logs / f'{name}-{run}.log')
+                result['pass'] = run
+                results.append(result)
+                status = '✅' if result['exitCode'] == 0 else f"✗ exit {result['exitCode']}"
+                print(f"  {status} {name:<8} {run:<4} {result['seconds']:>8.3f}s  "
+                      f"peak RSS {(result['peakTreeRssBytes'] or result['peakProcessRssBytes']) / 1048576:.0f}MB")
+
+        report = {'version': REPORT_VERSION, 'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                  'spec': spec, 'environment': environment(), 'project': counts, 'stages': results}
+
+        if args.render:
+            if counts['videos'] > counts['realVideos']:
+                print('⚠️  ffmpeg missing: video clips are placeholders and will fail to render')
+            result, times = render_stage(project_dir, work_dir, args.composition, args.render_frames, logs)
+            result['pass'] = 'cold'
+            report['stages'].append(result)
+            if not times:
+                times = parse_frame_log(result['log'])
+            report['render'] = {**profile(times, load_manifest(project_dir), args.slow_factor, args.slow_ms),
+                                'seconds': result['seconds'], 'startupSeconds': result.get('startupSeconds')}
+            hist = report['render']['histogram']
+            print(f"  🎞️  render {result['seconds']:.1f}s, {hist.get('frames', 0)} frames timed, "
+                  f"p50 {hist.get('p50Ms')}ms p99 {hist.get('p99Ms')}ms, "
+                  f"{len(report['render']['slowFrames'])} slow frame(s)")
+
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(output, dump_json(report))
+        print(f'📄 Report: {output}')
+
+        failed = [s['stage'] for s in report['stages'] if s['exitCode'] != 0]
+        if failed:
+            print(f"✗ Failed stages: {', '.join(failed)} (logs in {logs})")
+        regressions = []
+        if args.baseline:
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                regressions = compare(report, json.load(f), args.tolerance)
+            for line in regressions:
+                print(f'  🐢 regression: {line}')
+            if not regressions:
+                print(f'✅ No regressions vs. {args.baseline}')
+        return 1 if failed or regressions else 0
+    finally:
+        server.shutdown()
+        if args.keep:
+            print(f'📁 Kept {work_dir}')
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,568 @@
+#!/usr/bin/env python3
+"""
+Compile a project into a render-ready manifest (<project>/render-manifest.json).
+
+At render time project-loader.ts used to fetch script.json, resources.json
+and the .otio file, then merge resource candidates per scene and resolve
+paths inside headless Chromium before delayRender('Loading project') could
+continue. This step does that work offline, once, with the same rules
+(a port of fixOtioPaths / buildScenePreferredMediaUrls / convertScriptToOtio):
+
+  - timeline: the OTIO with every target_url resolved (project-relative,
+    file:// under public/ for other projects' files, or remote)
+  - clips: per-clip track, frame range, media source and component
+  - media: dimensions (image headers, ffprobe for video/audio when
+    available), duration and size of every referenced local file
+  - preload: media sources in order of first use
+  - sources: size/mtime of the inputs and of every referenced local media
+    file, so stale manifests are detected (a download or resize makes the
+    manifest stale too)
+
+media and preload are informational (reports, bench_render.py); the player
+only reads timeline. The file is rewritten only when its content changes,
+so an up-to-date project keeps its directory mtime (generate-project-list.js
+sorts by it).
+
+project-loader.ts loads this file instead of the raw inputs only when the
+render asks for it with the useRenderManifest input prop (render_chunks.py
+does, after refreshing the manifest). Studio and plain `remotion render`
+keep reading the live files.
+
+Usage:
+  python3 scripts/build_manifest.py [project-id ...]
+  python3 scripts/build_manifest.py --check          # exit 1 if any manifest is stale
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import quote
+
+from image_info import image_size
+from project_files import PROJECTS_DIR, PUBLIC_DIR, atomic_write_text, dump_json, iter_projects
+
+MANIFEST_FILE = 'render-manifest.json'
+MANIFEST_VERSION = 1
+FPS = 30  # compositions in src/Root.tsx render at 30fps
+
+# Mirrors src/config/aspect-ratios.ts
+ASPECT_RATIOS = {
+    '9:16': (1080, 1920),
+    '16:9': (1920, 1080),
+    '1:1': (1080, 1080),
+    '4:5': (1080, 1350),
+}
+DEFAULT_ASPECT_RATIO = '9:16'
+RESOURCE_CATEGORIES = ('videos', 'images', 'generatedImages', 'pinnedResources')
+
+_URI_COMPONENT_SAFE = "!*'()"  # with quote()'s own A-Z a-z 0-9 _.-~: what encodeURIComponent keeps
+_EXTERNAL = re.compile(r'^(https?:|data:|blob:|file:)', re.I)
+_IMAGE = re.compile(r'\.(jpg|jpeg|png|gif|webp|svg)($|\?)', re.I)
+_VIDEO = re.compile(r'\.(mp4|webm|mov|m4v)($|\?)', re.I)
+_MEDIA = re.compile(r'\.(mp4|webm|mov|m4v|jpg|jpeg|png|gif|webp|svg)($|\?)', re.I)
+_INVALID_LOCAL = re.compile(r'\.(dat|tmp|part)($|\?)', re.I)
+
+
+# ─── Port of project-loader.ts resolution rules ─────────────────────────────
+
+def flatten_scenes(script):
+    if not isinstance(script, dict):
+        return []
+    if isinstance(script.get('scenes'), list):
+        return script['scenes']
+    if isinstance(script.get('sections'), list):
+        return [scene for section in script['sections'] for scene in (section or {}).get('scenes') or []]
+    return []
+
+
+def pick_local_path(resource):
+    if not isinstance(resource, dict):
+        return None
+    for key in ('importedPath', 'relativePath', 'localPath'):
+        value = resource.get(key)
+        if isinstance(value, str) and value.strip() and not _INVALID_LOCAL.search(value.strip()):
+            return value.strip()
+    return None
+
+
+def pick_remote_url(resource):
+    if not isinstance(resource, dict):
+        return None
+    urls = resource.get('downloadUrls') if isinstance(resource.get('downloadUrls'), dict) else {}
+    candidates = [resource.get('downloadUrl'), urls.get('4k'), urls.get('hd'), urls.get('large'),
+                  urls.get('medium'), urls.get('original'), urls.get('sd'), resource.get('url')]
+    candidates = [c for c in candidates if isinstance(c, str) and c]
+    for c in candidates:
+        if _MEDIA.search(c):
+            return c
+    for c in candidates:
+        if not re.search(r'pexels\.com/(video|photo)/', c, re.I):
+            return c
+    return None
+
+
+def to_project_media(project_dir, maybe_path):
+    """Resolve a resource path the way toProjectMediaUrl does, minus the base URL.
+
+    Returns a project-relative path, a file:// URL under public/ for files
+    of other projects (sanitizeUrl maps those through staticFile), or the
+    external URL unchanged.
+    """
+    if not maybe_path:
+        return None
+    normalized = maybe_path.replace('\\', '/')
+    if _EXTERNAL.match(normalized):
+        return normalized
+    m = re.search(r'public/projects/(.+)', normalized, re.I)
+    if m:
+        rel = m.group(1).lstrip('/')
+        own = f'{project_dir.name}/'
+        if rel.startswith(own):
+            return rel[len(own):]
+        return f'file://{PUBLIC_DIR.as_posix()}/projects/{rel}'
+    return normalized.lstrip('/')
+
+
+def local_resources_by_scene(resources):
+    by_scene = {}
+    groups = (resources or {}).get('resources') if isinstance(resources, dict) else None
+    if not isinstance(groups, dict):
+        return by_scene
+    for category in RESOURCE_CATEGORIES:
+        for entry in groups.get(category) or []:
+            if isinstance(entry, dict) and entry.get('sceneId') and isinstance(entry.get('results'), list):
+                by_scene.setdefault(entry['sceneId'], []).extend(entry['results'])
+    return by_scene
+
+
+def _selected_ids(scene):
+    ids = scene.get('selectedResourceIds')
+    if isinstance(ids, list) and ids:
+        return ids
+    return [scene['selectedResourceId']] if scene.get('selectedResourceId') else []
+
+
+def _choose_media(project_dir, scene, candidates):
+    selected_ids = _selected_ids(scene)
+    selected = next((r for r in candidates if isinstance(r, dict) and r.get('id') in selected_ids), None) \
+        if selected_ids else None
+    local = pick_local_path(selected) or next(
+        (p for p in (pick_local_path(r) for r in candidates) if p), None)
+    if local:
+        return to_project_media(project_dir, local), selected
+    return None, selected
+
+
+def scene_preferred_media(project_dir, script, resources):
+    """Port of buildScenePreferredMediaUrls (resources.json candidates first)."""
+    by_scene = local_resources_by_scene(resources)
+    urls = []
+    for scene in flatten_scenes(script):
+        scene = scene or {}
+        candidates = by_scene.get(scene.get('id'), []) + (scene.get('resourceCandidates') or [])
+        media, selected = _choose_media(project_dir, scene, candidates)
+        if not media:
+            media = pick_remote_url(selected) or next(
+                (u for u in (pick_remote_url(r) for r in candidates) if u), None)
+        if media:
+            urls.append(media)
+    return urls
+
+
+def _is_clip(item):
+    return isinstance(item, dict) and str(item.get('OTIO_SCHEMA', '')).startswith('Clip')
+
+
+def force_local_media(timeline, preferred):
+    """Port of forceLocalMediaOnMainVideoTrack."""
+    if not preferred:
+        return
+    for track in ((timeline.get('tracks') or {}).get('children') or []):
+        if track.get('kind') != 'Video':
+            continue
+        clips = [item for item in track.get('children') or [] if _is_clip(item)]
+        if not clips or all((clip.get('metadata') or {}).get('remotion_component') for clip in clips):
+            continue
+        for clip, url in zip(clips, preferred):
+            if not url:
+                continue
+            key = clip.get('active_media_reference_key') or 'DEFAULT_MEDIA'
+            refs = clip.setdefault('media_references', {})
+            if refs.get(key):
+                refs[key]['target_url'] = url
+            else:
+                refs[key] = {'OTIO_SCHEMA': 'ExternalReference.1', 'target_url': url}
+        break
+
+
+def normalize_paths(item):
+    """Normalize target_urls like fixOtioPaths, leaving them project-relative."""
+    if not isinstance(item, dict):
+        return
+    for ref in (item.get('media_references') or {}).values():
+        if isinstance(ref, dict) and ref.get('target_url'):
+            url = str(ref['target_url']).replace('\\', '/')
+            ref['target_url'] = url if _EXTERNAL.match(url) else url.lstrip('/')
+    tracks = item.get('tracks')
+    if isinstance(tracks, dict):
+        normalize_paths(tracks)
+    for child in item.get('children') or []:
+        normalize_paths(child)
+
+
+def _rt(frames):
+    return {'OTIO_SCHEMA': 'RationalTime.1', 'rate': FPS, 'value': frames}
+
+
+def _range(frames):
+    return {'OTIO_SCHEMA': 'TimeRange.1', 'start_time': _rt(0), 'duration': _rt(frames)}
+
+
+def convert_script_to_otio(project_dir, script, resources):
+    """Port of convertScriptToOtio for projects without an .otio file."""
+    scenes = flatten_scenes(script)
+    ratio = (script.get('metadata') or {}).get('ratio') or DEFAULT_ASPECT_RATIO
+    width, height = ASPECT_RATIOS.get(ratio, ASPECT_RATIOS[DEFAULT_ASPECT_RATIO])
+    by_scene = local_resources_by_scene(resources)
+
+    total_frames = 0
+    if scenes:
+        last = scenes[-1]
+        total_frames = (last.get('startTime', 0) + last.get('duration', 0)) * FPS
+
+    video_clips, text_clips = [], []
+    for scene in scenes:
+        frames = round(scene.get('duration', 0) * FPS)
+        # script candidates first here, unlike scene_preferred_media (same as the TS code)
+        candidates = (scene.get('resourceCandidates') or []) + by_scene.get(scene.get('id'), [])
+        media, selected = _choose_media(project_dir, scene, candidates)
+        if not media:
+            selected = selected or {}
+            urls = selected.get('downloadUrls') or {}
+            media = selected.get('downloadUrl') or urls.get('hd') or urls.get('large') or \
+                urls.get('medium') or selected.get('url') or \
+                f"https://placehold.co/{width}x{height}?text={quote(str(scene.get('id')), safe=_URI_COMPONENT_SAFE)}"
+        video_clips.append({
+            'OTIO_SCHEMA': 'Clip.1', 'name': scene.get('id'), 'source_range': _range(frames),
+            'media_references': {'DEFAULT_MEDIA': {'OTIO_SCHEMA': 'ExternalReference.1', 'target_url': media}},
+            'active_media_reference_key': 'DEFAULT_MEDIA',
+        })
+        text_clips.append({
+            'OTIO_SCHEMA': 'Clip.1', 'name': f"Text-{scene.get('id')}",
+            'metadata': {'remotion_component': 'PersistentTitle', 'props': {'title': scene.get('text')}},
+            'source_range': _range(frames),
+            'media_references': {'DEFAULT_MEDIA': {'OTIO_SCHEMA': 'MissingReference.1'}},
+        })
+
+    voice = {
+        'OTIO_SCHEMA': 'Clip.1', 'name': 'Voiceover', 'source_range': _range(total_frames),
+        'media_references': {'DEFAULT_MEDIA': {'OTIO_SCHEMA': 'ExternalReference.1', 'target_url': 'voice.mp3'}},
+        'active_media_reference_key': 'DEFAULT_MEDIA',
+    }
+    return {
+        'OTIO_SCHEMA': 'Timeline.1',
+        'name': (script.get('metadata') or {}).get('projectName') or 'Converted Project',
+        'metadata': {'ratio': ratio, 'width': width, 'height': height},
+        'tracks': {'OTIO_SCHEMA': 'Stack.1', 'children': [
+            {'OTIO_SCHEMA': 'Track.1', 'name': 'Video', 'kind': 'Video', 'children': video_clips},
+            {'OTIO_SCHEMA': 'Track.1', 'name': 'Audio', 'kind': 'Audio', 'children': [voice]},
+            {'OTIO_SCHEMA': 'Track.1', 'name': 'Text', 'kind': 'Video', 'children': text_clips},
+        ]},
+    }
+
+
+# ─── Frame ranges and media facts ────────────────────────────────────────────
+
+def to_frames(rt):
+    if not isinstance(rt, dict) or not rt.get('rate'):
+        return 0
+    return round(rt.get('value', 0) / rt['rate'] * FPS)
+
+
+def clip_ranges(timeline):
+    """Per-clip frame ranges, using the sequencing rules of calculateTotalDuration.
+
+    Returns (clips, duration_in_frames).
+    """
+    clips = []
+    max_frames = 0
+    for track_index, track in enumerate((timeline.get('tracks') or {}).get('children') or []):
+        seconds = 0.0
+        for item_index, item in enumerate(track.get('children') or []):
+            schema = str(item.get('OTIO_SCHEMA', ''))
+            if schema.startswith('Transition'):
+                in_off, out_off = item.get('in_offset'), item.get('out_offset')
+                if in_off and out_off:
+                    seconds -= in_off['value'] / in_off['rate'] + out_off['value'] / out_off['rate']
+                continue
+            duration = (item.get('source_range') or {}).get('duration')
+            if not duration or not duration.get('rate'):
+                continue
+            start = round(seconds * FPS)
+            seconds += duration['value'] / duration['rate']
+            if not schema.startswith('Clip'):
+                continue
+            key = item.get('active_media_reference_key') or 'DEFAULT_MEDIA'
+            src = ((item.get('media_references') or {}).get(key) or {}).get('target_url')
+            metadata = item.get('metadata') or {}
+            clips.append({
+                'track': track_index,
+                'trackName': track.get('name'),
+                'trackKind': track.get('kind'),
+                'index': item_index,
+                'name': item.get('name'),
+                'startFrame': start,
+                'durationFrames': to_frames(duration),
+                'sourceStartFrame': to_frames((item.get('source_range') or {}).get('start_time')),
+                'src': src,
+                'component': metadata.get('remotion_component'),
+            })
+        max_frames = max(max_frames, round(seconds * FPS))
+    return clips, (max_frames if max_frames > 0 else 30 * FPS)
+
+
+def local_file(project_dir, src):
+    """Filesystem path for a manifest src, or None for remote/unknown sources."""
+    if not src or re.match(r'^(https?:|data:|blob:)', src, re.I):
+        return None
+    if src.startswith('file://'):
+        return Path(src[len('file://'):])
+    return project_dir / src.split('?')[0]
+
+
+def probe_av(path):
+    """Width, height and duration from ffprobe, or {} when ffprobe is missing."""
+    if not shutil.which('ffprobe'):
+        return {}
+    try:
+        out = subprocess.run(
+            ['ffprobe', '-v', 'error', '-show_entries', 'stream=width,height:format=duration',
+             '-of', 'json', str(path)], capture_output=True, text=True, timeout=30, check=True).stdout
+        data = json.loads(out)
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return {}
+    facts = {}
+    for stream in data.get('streams') or []:
+        if stream.get('width'):
+            facts.update(width=stream['width'], height=stream['height'])
+            break
+    if (data.get('format') or {}).get('duration'):
+        facts['durationSeconds'] = float(data['format']['duration'])
+    return facts
+
+
+def media_facts(project_dir, src, kind):
+    path = local_file(project_dir, src)
+    if path is None:
+        return {'type': kind, 'local': False}
+    if not path.is_file():
+        return {'type': kind, 'local': True, 'missing': True}
+    facts = {'type': kind, 'local': True, 'bytes': path.stat().st_size}
+    if kind == 'image':
+        info = image_size(path)
+        if info:
+            facts.update(width=info[0], height=info[1])
+    else:
+        facts.update(probe_av(path))
+    return facts
+
+
+def media_kind(src, track_kind):
+    if track_kind == 'Audio':
+        return 'audio'
+    if _IMAGE.search(src):
+        return 'image'
+    if _VIDEO.search(src):
+        return 'video'
+    return 'other'
+
+
+# ─── Build ───────────────────────────────────────────────────────────────────
+
+def read_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def source_files(project_dir):
+    """Inputs that decide the manifest's content, mirroring loadProject's choice."""
+    otio_files = sorted(p.name for p in project_dir.glob('*.otio'))
+    names = otio_files[:1] + ['script.json', 'resources.json']
+    return [name for name in names if (project_dir / name).is_file()]
+
+
+def _stat(path):
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def fingerprint(project_dir):
+    return {name: _stat(project_dir / name) for name in source_files(project_dir)}
+
+
+def media_fingerprint(project_dir, srcs):
+    """size/mtime of local media sources (None while a file is missing)."""
+    return {src: _stat(local_file(project_dir, src)) for src in srcs}
+
+
+def is_stale(project_dir):
+    manifest = read_json(project_dir / MANIFEST_FILE)
+    if not manifest or manifest.get('version') != MANIFEST_VERSION:
+        return True
+    sources = manifest.get('sources') or {}
+    recorded = sources.get('media') or {}
+    return sources.get('inputs') != fingerprint(project_dir) \
+        or recorded != media_fingerprint(project_dir, recorded)
+
+
+def build_manifest(project_dir):
+    """Build the manifest dict for a project, or None if it has nothing to render."""
+    project_dir = Path(project_dir)
+    sources = fingerprint(project_dir)
+    otio_name = next((name for name in sources if name.endswith('.otio')), None)
+    script = read_json(project_dir / 'script.json') if 'script.json' in sources else None
+    resources = read_json(project_dir / 'resources.json') if 'resources.json' in sources else None
+
+    if otio_name:
+        timeline = read_json(project_dir / otio_name)
+        if not isinstance(timeline, dict):
+            raise ValueError(f'{otio_name} is not valid JSON')
+        normalize_paths(timeline)
+        if str(timeline.get('OTIO_SCHEMA', '')).startswith('Timeline'):
+            force_local_media(timeline, scene_preferred_media(project_dir, script, resources))
+    elif isinstance(script, dict):
+        timeline = convert_script_to_otio(project_dir, script, resources)
+    else:
+        return None
+
+    metadata = timeline.get('metadata') or {}
+    ratio = metadata.get('ratio') or ((script or {}).get('metadata') or {}).get('ratio')
+    width, height = ASPECT_RATIOS.get(ratio, (metadata.get('width'), metadata.get('height')))
+    clips, duration = clip_ranges(timeline)
+
+    media = {}
+    preload = []
+    local_media = []
+    for clip in sorted(clips, key=lambda c: c['startFrame']):
+        src = clip['src']
+        if not src:
+            continue
+        if src not in media:
+            media[src] = media_facts(project_dir, src, media_kind(src, clip['trackKind']))
+            if media[src].get('local'):
+                local_media.append(src)
+                if not media[src].get('missing'):
+                    preload.append(src)
+        facts = media[src]
+        for key in ('width', 'height', 'durationSeconds'):
+            if key in facts:
+                clip[f'media{key[0].upper()}{key[1:]}'] = facts[key]
+
+    return {
+        'version': MANIFEST_VERSION,
+        'projectId': project_dir.name,
+        'generatedAt': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'sources': {'inputs': sources, 'media': media_fingerprint(project_dir, local_media)},
+        'fps': FPS,
+        'ratio': ratio,
+        'width': width,
+        'height': height,
+        'durationInFrames': duration,
+        'timeline': timeline,
+        'clips': clips,
+        'media': media,
+        'preload': preload,
+    }
+
+
+def load_manifest(project_dir):
+    """Return the project's manifest, rebuilding it first if it is stale."""
+    project_dir = Path(project_dir)
+    if is_stale(project_dir):
+        write_manifest(project_dir)
+    return read_json(project_dir / MANIFEST_FILE)
+
+
+def _same_content(a, b):
+    if not isinstance(a, dict) or not isinstance(b, dict):
+        return False
+    return {k: v for k, v in a.items() if k != 'generatedAt'} == \
+        {k: v for k, v in b.items() if k != 'generatedAt'}
+
+
+def write_manifest(project_dir):
+    """Build and save a manifest. Returns a short status string."""
+    project_dir = Path(project_dir)
+    manifest = build_manifest(project_dir)
+    if manifest is None:
+        return 'skipped (no .otio or script.json)'
+    if _same_content(read_json(project_dir / MANIFEST_FILE), manifest):
+        return 'unchanged'
+    atomic_write_text(project_dir / MANIFEST_FILE, dump_json(manifest))
+    missing = sum(1 for m in manifest['media'].values() if m.get('missing'))
+    remote = sum(1 for m in manifest['media'].values() if not m.get('local'))
+    note = ''.join([f', {missing} missing' if missing else '', f', {remote} remote' if remote else ''])
+    return (f"{len(manifest['clips'])} clips, {manifest['durationInFrames']} frames, "
+            f"{len(manifest['preload'])} local media{note}")
+
+
+def _build_job(project_dir):
+    try:
+        return project_dir.name, write_manifest(project_dir), None
+    except (OSError, ValueError) as e:
+        return project_dir.name, None, str(e)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compile projects into render manifests.')
+    parser.add_argument('projects', nargs='*', help='project ids (default: all)')
+    parser.add_argument('--projects-dir', default=str(PROJECTS_DIR))
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--force', action='store_true', help='rebuild even if up to date')
+    parser.add_argument('--check', action='store_true', help='exit 1 if any manifest is stale')
+    args = parser.parse_args(argv)
+
+    projects = list(iter_projects(args.projects_dir, args.projects))
+    if args.check:
+        stale = [p.name for p in projects if source_files(p) and is_stale(p)]
+        for name in stale:
+            print(f'! {name}: manifest is stale')
+        return 1 if stale else 0
+
+    targets = [p for p in projects if source_files(p) and (args.force or is_stale(p))]
+    if not targets:
+        print(f'✅ {len(projects)} project(s), all manifests up to date')
+        return 0
+    jobs = max(1, min(args.jobs, len(targets)))
+    if jobs == 1:
+        outcomes = map(_build_job, targets)
+    else:
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        outcomes = pool.map(_build_job, targets)
+    failed = 0
+    for name, status, error in outcomes:
+        if error:
+            failed += 1
+            print(f'✗ {name}: {error}')
+        else:
+            print(f'📜 {name}: {status}')
+    if jobs > 1:
+        pool.shutdown()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
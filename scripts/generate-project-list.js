@@ -1,84 +1,311 @@
+/**
+ * Generate the project list for Remotion Studio and the planner.
+ *
+ * Keeps a persistent index (src/generated/.project-index.json) with a
+ * fingerprint (size + mtime) of each project's script.json, resources.json
+ * and .otio files. Unchanged projects are reused from the index, so only
+ * projects whose files changed are re-read and re-parsed, and the output files
+ * are only rewritten when their content changes (a rewrite of
+ * src/generated/projects.json triggers a webpack rebuild).
+ *
+ * Usage:
+ *   node scripts/generate-project-list.js            # incremental update
+ *   node scripts/generate-project-list.js --full     # ignore the index
+ *   node scripts/generate-project-list.js --watch    # keep running, push changes
+ *
+ * --watch updates the list on file-system events and pushes them to the
+ * Studio over Server-Sent Events (http://localhost:3124/events, or
+ * REMOTION_PROJECT_WATCH_PORT), so OtioPlayer reloads a project when its
+ * files change instead of polling every 2s.
+ */
 const fs = require('fs');
 const path = require('path');
+const http = require('http');
 
 const PROJECTS_DIR = path.join(__dirname, '../public/projects');
 const OUTPUT_FILE = path.join(__dirname, '../src/generated/projects.json');
 const PUBLIC_OUTPUT_FILE = path.join(__dirname, '../public/projects-list.json');
+const INDEX_FILE = path.join(__dirname, '../src/generated/.project-index.json');
+const INDEX_VERSION = 1;
+const WATCH_PORT = Number(process.env.REMOTION_PROJECT_WATCH_PORT) || 3124;
+const WATCH_DEBOUNCE_MS = 150;
 
-function getProjects() {
+const isTrackedFile = (name) => name === 'script.json' || name === 'resources.json' || name.endsWith('.otio');
+
+function fingerprint(filePath) {
+    try {
+        const st = fs.statSync(filePath);
+        return `${st.size}:${st.mtimeMs}`;
+    } catch (e) {
+        return null;
+    }
+}
+
+function loadIndex() {
+    try {
+        const index = JSON.parse(fs.readFileSync(INDEX_FILE, 'utf-8'));
+        if (index.version === INDEX_VERSION && index.projects) return index.projects;
+    } catch (e) {
+        // Missing or corrupt index: full rescan
+    }
+    return {};
+}
+
+function writeIfChanged(filePath, content) {
+    try {
+        if (fs.readFileSync(filePath, 'utf-8') === content) return false;
+    } catch (e) {
+        // Not written yet
+    }
+    fs.mkdirSync(path.dirname(filePath), { recursive: true });
+    const tmpPath = `${filePath}.${process.pid}.tmp`;
+    fs.writeFileSync(tmpPath, content);
+    fs.renameSync(tmpPath, filePath);
+    return true;
+}
+
+/**
+ * Scan one project, reusing its index record when nothing changed.
+ * Returns { record, reparsed } or null when the item is not a directory.
+ */
+function scanProject(item, cached) {
+    const itemPath = path.join(PROJECTS_DIR, item);
+    let stats;
+    try {
+        stats = fs.statSync(itemPath);
+    } catch (e) {
+        return null;
+    }
+    if (!stats.isDirectory()) return null;
+
+    // Adding/removing files changes the directory mtime; otherwise the list
+    // of tracked files from the index is still valid.
+    const fingerprintAll = (files) => Object.fromEntries(files.map(f => [f, fingerprint(path.join(itemPath, f))]));
+    let sameDir = !!cached && cached.dirMtime === stats.mtimeMs;
+    let files = sameDir ? cached.files : fs.readdirSync(itemPath).filter(isTrackedFile);
+    let fingerprints = fingerprintAll(files);
+    if (sameDir && files.some(f => !fingerprints[f])) {
+        // A tracked file vanished within the mtime granularity: list again
+        sameDir = false;
+        files = fs.readdirSync(itemPath).filter(isTrackedFile);
+        fingerprints = fingerprintAll(files);
+    }
+
+    const unchanged = sameDir && files.every(file => fingerprints[file] === cached.fingerprints[file]);
+    if (unchanged) return { record: cached, reparsed: false };
+
+    const hasScript = files.includes('script.json');
+    const otioFiles = files.filter(f => f.endsWith('.otio'));
+    const hasOtio = otioFiles.length > 0;
+    let entry = null;
+
+    if (hasScript || hasOtio) {
+        // Read aspect ratio from script.json only if it changed
+        let ratio = null;
+        if (hasScript) {
+            const scriptChanged = !cached || !cached.entry || cached.fingerprints['script.json'] !== fingerprints['script.json'];
+            if (!scriptChanged) {
+                ratio = cached.entry.ratio;
+            } else {
+                try {
+                    const scriptContent = JSON.parse(
+                        fs.readFileSync(path.join(itemPath, 'script.json'), 'utf-8')
+                    );
+                    ratio = scriptContent.metadata?.ratio || null;
+                } catch (e) {
+                    // Ignore parse errors
+                }
+            }
+        }
+
+        entry = {
+            id: item,
+            name: item,
+            path: `projects/${item}`,
+            hasScript,
+            hasOtio,
+            otioFile: hasOtio ? otioFiles[0] : null,
+            ratio,
+            modifiedAt: stats.mtime.toISOString(),
+            timestamp: stats.mtime.getTime()
+        };
+    }
+
+    return {
+        record: { dirMtime: stats.mtimeMs, files, fingerprints, entry },
+        reparsed: true
+    };
+}
+
+/**
+ * Update the index from disk.
+ * Returns { projects, index, changedIds, reparsed }.
+ */
+function getProjects(previousIndex) {
     if (!fs.existsSync(PROJECTS_DIR)) {
         console.warn('Projects directory not found:', PROJECTS_DIR);
         // Create if not exists to avoid errors
         fs.mkdirSync(PROJECTS_DIR, { recursive: true });
-        return [];
+        return { projects: [], index: {}, changedIds: Object.keys(previousIndex), reparsed: 0 };
     }
 
     const items = fs.readdirSync(PROJECTS_DIR);
-    const projects = [];
+    const index = {};
+    const changedIds = [];
+    let reparsed = 0;
 
     for (const item of items) {
         if (item.startsWith('.')) continue;
 
-        const itemPath = path.join(PROJECTS_DIR, item);
-        const stats = fs.statSync(itemPath);
-
-        if (stats.isDirectory()) {
-            const files = fs.readdirSync(itemPath);
-            const hasScript = files.includes('script.json');
-            const otioFiles = files.filter(f => f.endsWith('.otio'));
-            const hasOtio = otioFiles.length > 0;
-
-            if (hasScript || hasOtio) {
-                // Read aspect ratio from script.json if available
-                let ratio = null;
-                if (hasScript) {
-                    try {
-                        const scriptContent = JSON.parse(
-                            fs.readFileSync(path.join(itemPath, 'script.json'), 'utf-8')
-                        );
-                        ratio = scriptContent.metadata?.ratio || null;
-                    } catch (e) {
-                        // Ignore parse errors
-                    }
-                }
-
-                projects.push({
-                    id: item,
-                    name: item,
-                    path: `projects/${item}`,
-                    hasScript,
-                    hasOtio,
-                    otioFile: hasOtio ? otioFiles[0] : null,
-                    ratio,
-                    modifiedAt: stats.mtime.toISOString(),
-                    timestamp: stats.mtime.getTime()
-                });
-            }
+        const result = scanProject(item, previousIndex[item]);
+        if (!result) continue;
+        index[item] = result.record;
+        if (result.reparsed) {
+            reparsed++;
+            changedIds.push(item);
         }
     }
+    for (const id of Object.keys(previousIndex)) {
+        if (!index[id]) changedIds.push(id);
+    }
+
+    const projects = Object.values(index).map(r => r.entry).filter(Boolean);
 
     // Sort by modification time (newest first)
     projects.sort((a, b) => b.timestamp - a.timestamp);
 
-    return projects;
+    return { projects, index, changedIds, reparsed };
+}
+
+/**
+ * Run one incremental update and write outputs that changed.
+ */
+function update(previousIndex) {
+    const started = process.hrtime.bigint();
+    const result = getProjects(previousIndex);
+
+    const jsonContent = JSON.stringify(result.projects, null, 2);
+    const listChanged = writeIfChanged(OUTPUT_FILE, jsonContent);
+    writeIfChanged(PUBLIC_OUTPUT_FILE, jsonContent);
+    if (result.changedIds.length > 0 || !fs.existsSync(INDEX_FILE)) {
+        writeIfChanged(INDEX_FILE, JSON.stringify({ version: INDEX_VERSION, projects: result.index }));
+    }
+
+    result.listChanged = listChanged;
+    result.elapsedMs = Number(process.hrtime.bigint() - started) / 1e6;
+    return result;
 }
 
-const projects = getProjects();
+// ─── Watch mode ──────────────────────────────────────────────────────────────
 
-// Ensure src/generated exists
-const generatedDir = path.dirname(OUTPUT_FILE);
-if (!fs.existsSync(generatedDir)) {
-    fs.mkdirSync(generatedDir, { recursive: true });
+function startEventServer() {
+    const clients = new Set();
+    const server = http.createServer((req, res) => {
+        if (req.url !== '/events') {
+            res.writeHead(404);
+            res.end();
+            return;
+        }
+        res.writeHead(200, {
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+            'Connection': 'keep-alive',
+            'Access-Control-Allow-Origin': '*'
+        });
+        res.write('retry: 2000\n\n');
+        clients.add(res);
+        req.on('close', () => clients.delete(res));
+    });
+    server.on('error', (e) => {
+        console.warn(`⚠️  Project event server disabled (${e.code || e.message}); Studio keeps polling`);
+    });
+    server.listen(WATCH_PORT, () => {
+        console.log(`📡 Pushing project changes on http://localhost:${WATCH_PORT}/events`);
+    });
+
+    // Keep idle connections alive through proxies
+    setInterval(() => clients.forEach(res => res.write(': ping\n\n')), 30000).unref();
+
+    return (event, data) => {
+        const message = `event: ${event}\ndata: ${JSON.stringify(data)}\n\n`;
+        clients.forEach(res => res.write(message));
+    };
 }
 
-// Write to both locations
-const jsonContent = JSON.stringify(projects, null, 2);
-fs.writeFileSync(OUTPUT_FILE, jsonContent);
-fs.writeFileSync(PUBLIC_OUTPUT_FILE, jsonContent);
+function watch(initialIndex) {
+    let index = initialIndex;
+    let timer = null;
+    const watchers = new Map();
+    const broadcast = startEventServer();
+
+    const schedule = () => {
+        clearTimeout(timer);
+        timer = setTimeout(refresh, WATCH_DEBOUNCE_MS);
+    };
 
-console.log(`✅ Generated project list with ${projects.length} projects.`);
+    // One non-recursive watcher per project: tracked files live at the
+    // project root, and this works on every platform (recursive fs.watch
+    // is not available everywhere).
+    const syncProjectWatchers = () => {
+        for (const [id, watcher] of watchers) {
+            if (!index[id]) {
+                watcher.close();
+                watchers.delete(id);
+            }
+        }
+        for (const id of Object.keys(index)) {
+            if (watchers.has(id)) continue;
+            try {
+                const watcher = fs.watch(path.join(PROJECTS_DIR, id), (eventType, filename) => {
+                    if (!filename || isTrackedFile(String(filename))) schedule();
+                });
+                watcher.on('error', () => {
+                    watcher.close();
+                    watchers.delete(id);
+                    schedule();
+                });
+                watchers.set(id, watcher);
+            } catch (e) {
+                // Project removed between scan and watch
+            }
+        }
+    };
+
+    function refresh() {
+        let result;
+        try {
+            result = update(index);
+        } catch (e) {
+            console.warn(`⚠️  Project list update failed: ${e.message}`);
+            return;
+        }
+        index = result.index;
+        syncProjectWatchers();
+        if (result.changedIds.length === 0) return;
+
+        const time = new Date().toLocaleTimeString();
+        console.log(`🔄 [${time}] ${result.changedIds.join(', ')} changed (${result.elapsedMs.toFixed(1)}ms)`);
+        result.changedIds.forEach(id => broadcast('project', { id }));
+        if (result.listChanged) broadcast('list', { count: result.projects.length });
+    }
+
+    fs.watch(PROJECTS_DIR, () => schedule());
+    syncProjectWatchers();
+    console.log(`👀 Watching ${PROJECTS_DIR} (${watchers.size} projects)`);
+}
+
+// ─── Main ────────────────────────────────────────────────────────────────────
+
+const args = process.argv.slice(2);
+const result = update(args.includes('--full') ? {} : loadIndex());
+
+console.log(`✅ Generated project list with ${result.projects.length} projects ` +
+    `(${result.reparsed} rescanned, ${result.elapsedMs.toFixed(1)}ms).`);
 console.log(`📁 Scanned projects from ${PROJECTS_DIR}`);
-console.log(`💾 Saved to:`);
+console.log(result.listChanged ? `💾 Saved to:` : `💾 Unchanged:`);
 console.log(`   - ${OUTPUT_FILE}`);
 console.log(`   - ${PUBLIC_OUTPUT_FILE}`);
 
+if (args.includes('--watch')) {
+    watch(result.index);
+}
@@ -0,0 +1,379 @@
+"""
+Streaming JSON reader and byte-span patcher for large resources.json / .otio files.
+
+The reader tokenizes the file in fixed-size chunks and only materializes the
+subtrees whose path matches one of the requested patterns, so peak memory is
+bounded by the chunk size plus the largest matched subtree (one scene group,
+one media reference) instead of the whole document.
+
+Every match carries the byte span of its value in the file. Those spans are
+what the patcher works with: targeted edits (a rewritten `target_url`, a new
+`localPath`, two swapped results) are spliced into the original bytes, so
+formatting and untouched content are preserved exactly, and the result is
+written through a temp file + rename.
+
+Patterns are tuples of path components:
+  'key'   an object key
+  3       an array index
+  '*'     any single key or index
+  '**'    any number of levels (including none)
+
+  for m in iter_values('project.otio', ('**', 'media_references', '*', 'target_url')):
+      print(m.path, m.value, m.start, m.end)
+"""
+
+import json
+import os
+import re
+import tempfile
+from collections import namedtuple
+
+CHUNK_SIZE = 1 << 16
+
+Match = namedtuple('Match', 'path value start end')
+
+_WS = re.compile(rb'[ \t\n\r]*')
+_STRING = re.compile(rb'"(?:[^"\\]|\\.)*"', re.S)
+_NUMBER = re.compile(rb'-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?')
+_NUMBER_CHARS = re.compile(rb'[-+0-9.eE]*')
+_LITERALS = {
+    ord('t'): (b'true', True),
+    ord('f'): (b'false', False),
+    ord('n'): (b'null', None),
+}
+_PUNCT = {ord(c): c for c in '{}[]:,'}
+
+
+class _Tokenizer:
+    """Chunked JSON tokenizer reporting absolute byte offsets.
+
+    Tokens are (kind, value, start, end) where kind is one of the
+    punctuation characters, 's' for strings or 'v' for other scalars.
+    """
+
+    def __init__(self, fp, chunk_size):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buf = b''
+        self.pos = 0
+        self.base = 0
+        self.eof = False
+
+    def _fill(self):
+        if self.eof:
+            return False
+        if self.pos:
+            self.base += self.pos
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf += chunk
+        return True
+
+    def _error(self, message):
+        return ValueError(f'{message} at byte {self.base + self.pos}')
+
+    def next(self):
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                break
+            if not self._fill():
+                return None
+
+        c = self.buf[self.pos]
+        start = self.base + self.pos
+        if c in _PUNCT:
+            self.pos += 1
+            return _PUNCT[c], None, start, start + 1
+
+        if c == 0x22:  # '"'
+            m = _STRING.match(self.buf, self.pos)
+            while m is None:
+                if not self._fill():
+                    raise self._error('Unterminated string')
+                m = _STRING.match(self.buf, self.pos)
+            raw = m.group()
+            self.pos = m.end()
+            value = json.loads(raw) if b'\\' in raw else raw[1:-1].decode('utf-8')
+            return 's', value, start, self.base + self.pos
+
+        if c in _LITERALS:
+            word, value = _LITERALS[c]
+            while len(self.buf) - self.pos < len(word) and self._fill():
+                pass
+            if not self.buf.startswith(word, self.pos):
+                raise self._error('Invalid literal')
+            self.pos += len(word)
+            return 'v', value, start, self.base + self.pos
+
+        run = _NUMBER_CHARS.match(self.buf, self.pos).end()
+        while run == len(self.buf) and self._fill():
+            run = _NUMBER_CHARS.match(self.buf, self.pos).end()
+        m = _NUMBER.match(self.buf, self.pos, run)
+        if m is None or m.end() != run:
+            raise self._error(f'Unexpected character {chr(c)!r}')
+        raw = m.group()
+        self.pos = run
+        value = float(raw) if any(ch in raw for ch in b'.eE') else int(raw)
+        return 'v', value, start, self.base + self.pos
+
+
+def _match(pattern, path, prefix):
+    """Glob-match a path against a pattern.
+
+    With prefix=True, answer whether some extension of path could still match.
+    """
+    if not path:
+        return prefix or all(p == '**' for p in pattern)
+    if not pattern:
+        return False
+    head = pattern[0]
+    if head == '**':
+        return _match(pattern[1:], path, prefix) or _match(pattern, path[1:], prefix)
+    if head == '*' or head == path[0]:
+        return _match(pattern[1:], path[1:], prefix)
+    return False
+
+
+class _Walker:
+    def __init__(self, tokenizer, patterns):
+        self.tok = tokenizer
+        self.patterns = [tuple(p) for p in patterns]
+
+    def _expect(self, kinds):
+        token = self.tok.next()
+        if token is None or token[0] not in kinds:
+            got = 'end of file' if token is None else repr(token[0])
+            raise ValueError(f'Expected one of {kinds!r}, got {got} at byte '
+                             f'{token[2] if token else self.tok.base + self.tok.pos}')
+        return token
+
+    def build(self, token):
+        """Materialize the value starting at token. Returns (value, end)."""
+        kind, value, _, end = token
+        if kind in ('s', 'v'):
+            return value, end
+        if kind == '{':
+            obj = {}
+            token = self._expect('}s')
+            if token[0] == '}':
+                return obj, token[3]
+            while True:
+                key = token[1]
+                self._expect(':')
+                obj[key], _ = self.build(self._expect('{[sv'))
+                token = self._expect(',}')
+                if token[0] == '}':
+                    return obj, token[3]
+                token = self._expect('s')
+        if kind == '[':
+            arr = []
+            token = self._expect(']{[sv')
+            if token[0] == ']':
+                return arr, token[3]
+            while True:
+                item, _ = self.build(token)
+                arr.append(item)
+                token = self._expect(',]')
+                if token[0] == ']':
+                    return arr, token[3]
+                token = self._expect('{[sv')
+        raise ValueError(f'Unexpected {kind!r} at byte {token[2]}')
+
+    def skip(self, token):
+        """Consume the value starting at token without building it."""
+        kind = token[0]
+        if kind in ('s', 'v'):
+            return token[3]
+        if kind not in '{[':
+            raise ValueError(f'Unexpected {kind!r} at byte {token[2]}')
+        depth = 1
+        while depth:
+            token = self.tok.next()
+            if token is None:
+                raise ValueError('Unexpected end of file')
+            if token[0] in '{[':
+                depth += 1
+            elif token[0] in '}]':
+                depth -= 1
+        return token[3]
+
+    def walk(self, path, token):
+        if any(_match(p, path, False) for p in self.patterns):
+            value, end = self.build(token)
+            yield Match(path, value, token[2], end)
+            return
+        if not any(_match(p, path, True) for p in self.patterns):
+            self.skip(token)
+            return
+
+        kind = token[0]
+        if kind == '{':
+            token = self._expect('}s')
+            if token[0] == '}':
+                return
+            while True:
+                key = token[1]
+                self._expect(':')
+                yield from self.walk(path + (key,), self._expect('{[sv'))
+                token = self._expect(',}')
+                if token[0] == '}':
+                    return
+                token = self._expect('s')
+        elif kind == '[':
+            token = self._expect(']{[sv')
+            if token[0] == ']':
+                return
+            index = 0
+            while True:
+                yield from self.walk(path + (index,), token)
+                index += 1
+                token = self._expect(',]')
+                if token[0] == ']':
+                    return
+                token = self._expect('{[sv')
+
+
+def iter_values(source, *patterns, chunk_size=CHUNK_SIZE):
+    """Yield a Match for every value whose path matches one of the patterns.
+
+    `source` is a path or a binary file object. Matches are yielded in
+    document order; values nested inside an already matched value are not
+    reported separately.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as fp:
+            yield from iter_values(fp, *patterns, chunk_size=chunk_size)
+        return
+    if not patterns:
+        return
+    tokenizer = _Tokenizer(source, chunk_size)
+    walker = _Walker(tokenizer, patterns)
+    first = tokenizer.next()
+    if first is None:
+        raise ValueError('Empty JSON document')
+    yield from walker.walk((), first)
+    if tokenizer.next() is not None:
+        raise ValueError('Extra data after JSON document')
+
+
+def read_span(path, start, end):
+    """Return the raw bytes of a span reported by iter_values."""
+    with open(path, 'rb') as fp:
+        fp.seek(start)
+        return fp.read(end - start)
+
+
+def encode_value(value):
+    """Encode a replacement value the way JSON.stringify would (UTF-8, no ASCII escaping)."""
+    return json.dumps(value, ensure_ascii=False).encode('utf-8')
+
+
+def apply_edits(path, edits, chunk_size=CHUNK_SIZE):
+    """Splice (start, end, replacement) edits into the file at path.
+
+    Edits must not overlap. The file is streamed into a sibling temp file
+    with the replacements applied and renamed over the original (atomic,
+    bounded memory), so readers never see a half-applied set of edits.
+
+    Returns the number of edits applied.
+    """
+    normalized = []
+    for start, end, replacement in edits:
+        if isinstance(replacement, str):
+            replacement = replacement.encode('utf-8')
+        normalized.append((start, end, replacement))
+    normalized.sort(key=lambda e: (e[0], e[1]))
+    for prev, cur in zip(normalized, normalized[1:]):
+        if cur[0] < prev[1]:
+            raise ValueError(f'Overlapping edits at bytes {prev[0]}-{prev[1]} and {cur[0]}-{cur[1]}')
+    if not normalized:
+        return 0
+
+    path = os.fspath(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f'.{os.path.basename(path)}.', suffix='.tmp',
+                                    dir=os.path.dirname(path) or '.')
+    try:
+        with open(path, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+            offset = 0
+            for start, end, replacement in normalized:
+                _copy_range(src, dst, start - offset, chunk_size)
+                dst.write(replacement)
+                src.seek(end)
+                offset = end
+            _copy_range(src, dst, None, chunk_size)
+        os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return len(normalized)
+
+
+def _copy_range(src, dst, length, chunk_size):
+    while length is None or length > 0:
+        chunk = src.read(chunk_size if length is None else min(chunk_size, length))
+        if not chunk:
+            return
+        dst.write(chunk)
+        if length is not None:
+            length -= len(chunk)
+
+
+def insert_members(raw, start, members):
+    """Build an edit appending members to a JSON object.
+
+    raw is the object's original bytes (from read_span) and start its
+    offset. New members go after the last existing one, using the object's
+    own indentation when it is pretty-printed. Returns (offset, offset, bytes)
+    for apply_edits.
+    """
+    body = raw[:-1].rstrip()
+    indent_match = re.search(rb'\n([ \t]*)"', raw)
+    parts = []
+    for key, value in members.items():
+        if indent_match:
+            indent = indent_match.group(1).decode()
+            rendered = json.dumps(value, indent=2, ensure_ascii=False).replace('\n', '\n' + indent)
+            parts.append(f'\n{indent}{json.dumps(key, ensure_ascii=False)}: {rendered}')
+        else:
+            parts.append(f' {json.dumps(key, ensure_ascii=False)}: {json.dumps(value, ensure_ascii=False)}')
+    text = ','.join(parts)
+    if not body.endswith(b'{'):
+        text = ',' + text
+    offset = start + len(body)
+    return offset, offset, text.encode('utf-8')
+
+
+# ─── Project file helpers ────────────────────────────────────────────────────
+
+RESOURCE_CATEGORIES = ('videos', 'images', 'generatedImages', 'pinnedResources')
+OTIO_TARGET_URL = ('**', 'media_references', '*', 'target_url')
+
+
+def iter_scene_groups(resources_path, categories=RESOURCE_CATEGORIES):
+    """Yield (category, Match) for every scene group in resources.json, one at a time."""
+    patterns = [('resources', category, '*') for category in categories]
+    for m in iter_values(resources_path, *patterns):
+        yield m.path[1], m
+
+
+def iter_target_urls(otio_path):
+    """Yield a Match for every media reference `target_url` in an .otio file."""
+    return iter_values(otio_path, OTIO_TARGET_URL)
+
+
+def rewrite_target_urls(otio_path, url_map):
+    """Replace target_urls found in url_map, touching only those byte spans.
+
+    Returns the number of references rewritten (0 leaves the file untouched).
+    """
+    edits = [(m.start, m.end, encode_value(url_map[m.value]))
+             for m in iter_target_urls(otio_path)
+             if isinstance(m.value, str) and m.value in url_map]
+    return apply_edits(otio_path, edits)
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Content-addressed media store shared by all projects.
+
+Downloaded stock media is stored once under objects/<sha256[:2]>/<sha256><ext>
+and linked into each project's public folder (hardlink, falling back to a
+symlink, then a copy). A SQLite index maps source URLs to content hashes and
+tracks last use for LRU eviction under a size cap.
+
+Hardlinked project files stay valid after eviction (the project keeps its own
+link); objects that are still referenced by a symlink are never evicted.
+Tools that modify media (image resizing) must write a new file and rename it
+over the old one, never edit a linked file in place. An object whose size or
+content no longer matches its hash (a linked file edited in place) is dropped
+from the store instead of being handed out.
+
+Usage:
+  python3 scripts/media_cache.py stats
+  python3 scripts/media_cache.py ingest [project-id ...]   # dedupe existing project media
+  python3 scripts/media_cache.py evict --max-size 20G
+  python3 scripts/media_cache.py gc                         # drop index rows for missing files
+
+The store lives in $VIBEDIO_MEDIA_CACHE (default ~/.cache/vibedio/media).
+Set $VIBEDIO_MEDIA_CACHE_MAX_SIZE (e.g. 20G) to cap it: every insert then
+evicts least-recently-used objects until the store fits (`evict` without
+--max-size uses the same cap).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+from project_files import PROJECTS_DIR, iter_projects, resolve_local_path, resource_urls
+
+DEFAULT_CACHE_DIR = Path(os.environ.get('VIBEDIO_MEDIA_CACHE') or
+                         Path.home() / '.cache' / 'vibedio' / 'media')
+MAX_SIZE_ENV = 'VIBEDIO_MEDIA_CACHE_MAX_SIZE'
+MEDIA_EXTENSIONS = {'.mp4', '.webm', '.mov', '.m4v', '.jpg', '.jpeg', '.png', '.gif', '.webp', '.mp3', '.wav', '.m4a'}
+MEDIA_DIRS = ('videos', 'images', 'imports', 'uploads', 'audio', 'music')
+HASH_CHUNK = 1 << 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    hash TEXT PRIMARY KEY,
+    ext TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    hash TEXT NOT NULL REFERENCES objects(hash) ON DELETE CASCADE,
+    etag TEXT,
+    fetched REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS links (
+    path TEXT PRIMARY KEY,
+    hash TEXT NOT NULL REFERENCES objects(hash) ON DELETE CASCADE,
+    kind TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS objects_last_used ON objects(last_used);
+CREATE INDEX IF NOT EXISTS links_hash ON links(hash);
+"""
+
+
+def parse_size(text):
+    """Parse sizes like '500M', '20G' or a plain byte count."""
+    text = str(text).strip().upper().rstrip('B')
+    units = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30, 'T': 1 << 40}
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def default_max_bytes():
+    """Size cap from $VIBEDIO_MEDIA_CACHE_MAX_SIZE, or None for no cap."""
+    value = os.environ.get(MAX_SIZE_ENV)
+    return parse_size(value) if value else None
+
+
+def format_size(n):
+    if n < 1024:
+        return f'{n}B'
+    for unit in ('KB', 'MB', 'GB'):
+        n /= 1024
+        if n < 1024 or unit == 'GB':
+            return f'{n:.1f}{unit}'
+
+
+def hash_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class MediaCache:
+    """Content-addressed store with a persistent SQLite index.
+
+    Safe to open from several processes at once (SQLite handles locking);
+    each process should open its own instance. max_bytes caps the store
+    after every insert (default: $VIBEDIO_MEDIA_CACHE_MAX_SIZE). A read_only
+    instance only supports contains() and stats().
+    """
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=None, read_only=False):
+        self.root = Path(root)
+        self.max_bytes = max_bytes if max_bytes is not None else default_max_bytes()
+        if read_only:
+            self.db = sqlite3.connect(f"file:{self.root / 'index.sqlite'}?mode=ro", uri=True, timeout=30)
+            return
+        (self.root / 'objects').mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.root / 'index.sqlite', timeout=30, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA foreign_keys=ON')
+        self.db.executescript(_SCHEMA)
+
+    @classmethod
+    def open_existing(cls, root=DEFAULT_CACHE_DIR, read_only=False):
+        """Open the store only if it was already created, else return None."""
+        if not (Path(root) / 'index.sqlite').exists():
+            return None
+        return cls(root, read_only=read_only)
+
+    def close(self):
+        self.db.close()
+
+    def object_path(self, digest, ext):
+        return self.root / 'objects' / digest[:2] / f'{digest}{ext}'
+
+    def _object(self, digest):
+        """Return the path of a stored object, or None when missing or corrupt.
+
+        The size is checked on every call; the content is re-hashed only when
+        the file was modified after it was stored.
+        """
+        row = self.db.execute('SELECT ext, size, created FROM objects WHERE hash = ?', (digest,)).fetchone()
+        if row is None:
+            return None
+        ext, size, created = row
+        path = self.object_path(digest, ext)
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            self.db.execute('DELETE FROM objects WHERE hash = ?', (digest,))
+            return None
+        if st.st_size == size and st.st_mtime <= created:
+            return path
+        if st.st_size == size and hash_file(path) == digest:
+            self.db.execute('UPDATE objects SET created = ? WHERE hash = ?', (st.st_mtime, digest))
+            return path
+        # Edited in place through a project link: the project keeps its
+        # (modified) file, the store forgets the object
+        print(f'⚠️  Cache object {digest[:12]} no longer matches its hash, dropping it', file=sys.stderr)
+        path.unlink()
+        self.db.execute('DELETE FROM objects WHERE hash = ?', (digest,))
+        return None
+
+    def _touch(self, digest):
+        self.db.execute('UPDATE objects SET last_used = ? WHERE hash = ?', (time.time(), digest))
+
+    # ─── Lookup ──────────────────────────────────────────────────────────────
+
+    def lookup(self, url):
+        """Return (object_path, etag) for a URL already in the store, or None."""
+        row = self.db.execute('SELECT hash, etag FROM urls WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return None
+        path = self._object(row[0])
+        if path is None:
+            return None
+        self._touch(row[0])
+        return path, row[1]
+
+    def contains(self, url):
+        """Whether url maps to a stored object of the recorded size.
+
+        Read-only: no LRU update and no cleanup of missing or corrupt objects
+        (for report-only passes).
+        """
+        row = self.db.execute('SELECT o.hash, o.ext, o.size FROM urls u JOIN objects o ON o.hash = u.hash '
+                              'WHERE u.url = ?', (url,)).fetchone()
+        if row is None:
+            return False
+        try:
+            return self.object_path(row[0], row[1]).stat().st_size == row[2]
+        except OSError:
+            return False
+
+    def lookup_hash(self, digest):
+        path = self._object(digest)
+        if path is not None:
+            self._touch(digest)
+        return path
+
+    # ─── Insert ──────────────────────────────────────────────────────────────
+
+    def add_file(self, src, url=None, etag=None, move=False, digest=None):
+        """Store the file at src (copy, or rename when move=True) and return its hash.
+
+        Content already present is not stored twice; the URL is simply
+        mapped to the existing object. Pass digest when the caller already
+        hashed the file.
+        """
+        src = Path(src)
+        digest = digest or hash_file(src)
+        ext = src.suffix.lower()
+        now = time.time()
+        dest = self._object(digest)
+        if dest is None:
+            dest = self.object_path(digest, ext)
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            tmp = dest.with_name(f'.{dest.name}.{os.getpid()}.tmp')
+            # Copy rather than hardlink: the store must not share an inode
+            # with a project file it did not link itself
+            if move:
+                shutil.move(str(src), tmp)
+            else:
+                shutil.copy2(src, tmp)
+            os.replace(tmp, dest)
+            self.db.execute('INSERT OR REPLACE INTO objects (hash, ext, size, created, last_used) '
+                            'VALUES (?, ?, ?, ?, ?)', (digest, ext, dest.stat().st_size, now, now))
+            if self.max_bytes is not None:
+                self.evict(self.max_bytes, keep={digest})
+        else:
+            self._touch(digest)
+            if move:
+                src.unlink()
+        if url:
+            self.db.execute('INSERT OR REPLACE INTO urls (url, hash, etag, fetched) VALUES (?, ?, ?, ?)',
+                            (url, digest, etag, now))
+        return digest
+
+    def stage(self, src):
+        """Place a copy of src inside the store for add_file(move=True).
+
+        Hardlinks when src is on the store's filesystem, otherwise copies.
+        Does not touch the index, so it can run in a worker thread.
+        """
+        src = Path(src)
+        staging = self.root / 'staging'
+        staging.mkdir(exist_ok=True)
+        tmp = staging / f'{os.getpid()}-{threading.get_ident()}-{time.monotonic_ns()}{src.suffix.lower()}'
+        try:
+            os.link(src, tmp)
+        except OSError:
+            shutil.copy2(src, tmp)
+        return tmp
+
+    # ─── Linking into projects ───────────────────────────────────────────────
+
+    def link(self, digest, dest, mode='auto'):
+        """Materialize an object at dest. Returns the link kind used.
+
+        mode: 'auto' (hardlink, then symlink, then copy), 'hardlink',
+        'symlink' or 'copy'. An existing dest is replaced atomically.
+        """
+        src = self._object(digest)
+        if src is None:
+            raise KeyError(f'Object not in cache: {digest}')
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if dest.exists() and os.path.samefile(src, dest):
+            kind = 'symlink' if dest.is_symlink() else 'hardlink'
+        else:
+            tmp = dest.with_name(f'.{dest.name}.{os.getpid()}.tmp')
+            kind = None
+            for candidate in (('hardlink', 'symlink', 'copy') if mode == 'auto' else (mode,)):
+                try:
+                    if candidate == 'hardlink':
+                        os.link(src, tmp)
+                    elif candidate == 'symlink':
+                        os.symlink(src, tmp)
+                    else:
+                        shutil.copy2(src, tmp)
+                        os.chmod(tmp, 0o644)
+                    kind = candidate
+                    break
+                except OSError:
+                    if os.path.lexists(tmp):
+                        os.unlink(tmp)
+            if kind is None:
+                raise OSError(f'Could not link {src} to {dest}')
+            os.replace(tmp, dest)
+        self.db.execute('INSERT OR REPLACE INTO links (path, hash, kind) VALUES (?, ?, ?)',
+                        (str(dest.absolute()), digest, kind))
+        self._touch(digest)
+        return kind
+
+    def resolve(self, urls, dest, mode='auto'):
+        """Link the first cached URL in urls to dest. Returns the link kind or None."""
+        for url in urls:
+            row = self.db.execute('SELECT hash FROM urls WHERE url = ?', (url,)).fetchone()
+            if row and self._object(row[0]) is not None:
+                return self.link(row[0], dest, mode)
+        return None
+
+    # ─── Maintenance ─────────────────────────────────────────────────────────
+
+    def stats(self):
+        count, total = self.db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM objects').fetchone()
+        urls = self.db.execute('SELECT COUNT(*) FROM urls').fetchone()[0]
+        links = self.db.execute('SELECT COUNT(*) FROM links').fetchone()[0]
+        return {'objects': count, 'bytes': total, 'urls': urls, 'links': links}
+
+    def _live_symlinks(self, digest):
+        live = 0
+        for path, in self.db.execute("SELECT path FROM links WHERE hash = ? AND kind = 'symlink'",
+                                     (digest,)).fetchall():
+            if os.path.islink(path):
+                live += 1
+            else:
+                self.db.execute('DELETE FROM links WHERE path = ?', (path,))
+        return live
+
+    def evict(self, max_bytes, keep=()):
+        """Delete least-recently-used objects until the store fits max_bytes.
+
+        Objects in keep (e.g. the one just inserted) are never removed.
+        Returns (objects_removed, bytes_freed).
+        """
+        total = self.stats()['bytes']
+        removed = freed = 0
+        if total <= max_bytes:
+            return removed, freed
+        rows = self.db.execute('SELECT hash, ext, size FROM objects ORDER BY last_used').fetchall()
+        for digest, ext, size in rows:
+            if total <= max_bytes:
+                break
+            if digest in keep or self._live_symlinks(digest):
+                continue
+            path = self.object_path(digest, ext)
+            if path.exists():
+                path.unlink()
+            self.db.execute('DELETE FROM objects WHERE hash = ?', (digest,))
+            total -= size
+            removed += 1
+            freed += size
+        return removed, freed
+
+    def gc(self):
+        """Drop index rows whose object or link no longer exists. Returns rows removed."""
+        removed = 0
+        for digest, ext in self.db.execute('SELECT hash, ext FROM objects').fetchall():
+            if not self.object_path(digest, ext).exists():
+                self.db.execute('DELETE FROM objects WHERE hash = ?', (digest,))
+                removed += 1
+        for path, in self.db.execute('SELECT path FROM links').fetchall():
+            if not os.path.lexists(path):
+                self.db.execute('DELETE FROM links WHERE path = ?', (path,))
+                removed += 1
+        return removed
+
+    def ingest_project(self, project_dir, mode='hardlink'):
+        """Move a project's media into the store and link it back.
+
+        URLs are taken from resources.json results whose localPath points at
+        the file, so later downloads of the same URL hit the cache. Returns
+        (files, bytes_deduplicated).
+        """
+        project_dir = Path(project_dir)
+        url_by_path = {}
+        res_path = project_dir / 'resources.json'
+        if res_path.exists():
+            from json_stream import iter_scene_groups
+            for _, m in iter_scene_groups(res_path):
+                group = m.value if isinstance(m.value, dict) else {}
+                for result in group.get('results') or [group]:
+                    if not isinstance(result, dict):
+                        continue
+                    urls = resource_urls(result)
+                    for key in ('localPath', 'relativePath'):
+                        if urls and isinstance(result.get(key), str) and result[key]:
+                            url_by_path[resolve_local_path(project_dir, result[key])] = urls[0]
+
+        files = saved = 0
+        for sub in MEDIA_DIRS:
+            base = project_dir / sub
+            if not base.is_dir():
+                continue
+            for path in sorted(base.rglob('*')):
+                if path.is_symlink() or not path.is_file() or path.suffix.lower() not in MEDIA_EXTENSIONS:
+                    continue
+                digest = hash_file(path)
+                if self._object(digest) is not None and not os.path.samefile(self._object(digest), path):
+                    saved += path.stat().st_size
+                self.add_file(path, url=url_by_path.get(path), digest=digest)
+                self.link(digest, path, mode)
+                files += 1
+        return files, saved
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Shared content-addressed media cache.')
+    parser.add_argument('--cache-dir', default=str(DEFAULT_CACHE_DIR))
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('stats', help='show store size and counts')
+    ingest = sub.add_parser('ingest', help='move existing project media into the store')
+    ingest.add_argument('projects', nargs='*', help='project ids (default: all)')
+    ingest.add_argument('--projects-dir', default=str(PROJECTS_DIR))
+    ingest.add_argument('--mode', choices=('hardlink', 'symlink', 'copy', 'auto'), default='auto')
+    evict = sub.add_parser('evict', help='LRU-evict objects above a size cap')
+    evict.add_argument('--max-size', type=parse_size, help=f'e.g. 500M, 20G (default: ${MAX_SIZE_ENV})')
+    sub.add_parser('gc', help='drop index rows for missing files')
+    args = parser.parse_args(argv)
+
+    cache = MediaCache(args.cache_dir)
+    try:
+        if args.command == 'stats':
+            stats = cache.stats()
+            print(json.dumps({**stats, 'size': format_size(stats['bytes']), 'root': str(cache.root)}, indent=2))
+        elif args.command == 'ingest':
+            total_files = total_saved = 0
+            for project_dir in iter_projects(args.projects_dir, args.projects):
+                files, saved = cache.ingest_project(project_dir, args.mode)
+                if files:
+                    print(f'📦 {project_dir.name}: {files} file(s), {format_size(saved)} deduplicated')
+                total_files += files
+                total_saved += saved
+            print(f'✅ Ingested {total_files} file(s), {format_size(total_saved)} deduplicated')
+        elif args.command == 'evict':
+            max_size = args.max_size if args.max_size is not None else cache.max_bytes
+            if max_size is None:
+                parser.error(f'--max-size is required when ${MAX_SIZE_ENV} is not set')
+            removed, freed = cache.evict(max_size)
+            print(f'🧹 Evicted {removed} object(s), freed {format_size(freed)}')
+        elif args.command == 'gc':
+            print(f'🧹 Removed {cache.gc()} stale index row(s)')
+    finally:
+        cache.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,6 +4,10 @@
  * Downloads all remote HTTP resources to local files before rendering.
  * This is the #1 optimization for render speed - local files = no HTTP seeks during render.
  *
+ * Downloads are delegated to scripts/prerender_fetch.py (resumable downloads,
+ * one download per URL, shared media cache across projects). The JS
+ * downloader below is the fallback when python3 is not installed.
+ *
  * Usage:
  *   node scripts/pre-render-download.js [project-id]
  *   node scripts/pre-render-download.js my-project
@@ -14,11 +18,17 @@ const fs = require('fs');
 const path = require('path');
 const https = require('https');
 const http = require('http');
-const { execSync } = require('child_process');
+const { execSync, execFileSync } = require('child_process');
 
 const PROJECTS_DIR = path.join(__dirname, '..', 'public', 'projects');
 const CONCURRENCY = 4; // parallel downloads
 const MAX_IMAGE_DIMENSION = 1920; // Max width/height for images - prevents OOM in headless Chrome
+const RESIZE_SCRIPT = path.join(__dirname, 'resize_images.py');
+const FETCH_SCRIPT = path.join(__dirname, 'prerender_fetch.py');
+const MANIFEST_SCRIPT = path.join(__dirname, 'build_manifest.py');
+// scripts/venv is created by setup-dependencies.js from scripts/requirements.txt (Pillow)
+const VENV_PYTHON = path.join(__dirname, 'venv', 'bin', 'python');
+const PYTHON = fs.existsSync(VENV_PYTHON) ? VENV_PYTHON : 'python3';
 
 /**
  * Resize an image to MAX_IMAGE_DIMENSION using sips (macOS built-in) or skip on other platforms.
@@ -176,6 +186,38 @@ async function runWithConcurrency(tasks, concurrency) {
 }
 
 async function processProject(projectPath) {
+    if (!fetchWithPython(projectPath)) {
+        await downloadProjectMedia(projectPath);
+    }
+    resizeProjectImages(projectPath);
+    buildRenderManifest(projectPath);
+}
+
+/**
+ * Download remote media with scripts/prerender_fetch.py, which shares the
+ * content-addressed media cache between projects and patches OTIO /
+ * resources.json itself. Returns false when python3 is not installed.
+ */
+function fetchWithPython(projectPath) {
+    try {
+        execFileSync(PYTHON, [
+            FETCH_SCRIPT,
+            '--projects-dir', path.dirname(projectPath),
+            path.basename(projectPath),
+        ], { stdio: 'inherit' });
+    } catch (e) {
+        if (e.code === 'ENOENT') return false;
+        // Failed downloads are reported above; keep going like the JS downloader
+        console.warn(`  ⚠️  Fetch stage failed: ${e.message}`);
+    }
+    return true;
+}
+
+/**
+ * JS fallback downloader (no python3): downloads into the project only,
+ * without the shared cache.
+ */
+async function downloadProjectMedia(projectPath) {
     const projectId = path.basename(projectPath);
     console.log(`\n📁 Project: ${projectId}`);
 
@@ -309,8 +351,49 @@ async function processProject(projectPath) {
     }
 
     console.log(`  📊 Downloaded: ${totalDownloaded}, Cached: ${totalSkipped}, Failed: ${totalFailed}`);
+}
+
+/**
+ * Compile render-manifest.json (resolved timeline + media facts) so the render
+ * loads one precomputed file instead of merging script/resources/OTIO per tab.
+ * Runs after downloads and resizing; the manifest fingerprints the media files,
+ * so it is only rebuilt (and rewritten) when they or the project files changed.
+ * Optional: without python3 the render falls back to the live project files.
+ */
+function buildRenderManifest(projectPath) {
+    try {
+        execFileSync(PYTHON, [
+            MANIFEST_SCRIPT,
+            '--projects-dir', path.dirname(projectPath),
+            path.basename(projectPath),
+        ], { stdio: 'inherit' });
+    } catch (e) {
+        if (e.code !== 'ENOENT') console.warn(`  ⚠️  Render manifest stage failed: ${e.message}`);
+    }
+}
+
+/**
+ * Downscale oversized images in a project.
+ * Prefers scripts/resize_images.py (cross-platform, header-only inspection, process pool,
+ * per-project index so unchanged images are skipped); falls back to per-file sips when
+ * python3 is not installed.
+ */
+function resizeProjectImages(projectPath) {
+    try {
+        execFileSync(PYTHON, [
+            RESIZE_SCRIPT,
+            '--projects-dir', path.dirname(projectPath),
+            '--max-dimension', String(MAX_IMAGE_DIMENSION),
+            path.basename(projectPath),
+        ], { stdio: 'inherit' });
+        return;
+    } catch (e) {
+        if (e.code !== 'ENOENT') {
+            console.warn(`  ⚠️  Image resize stage failed: ${e.message}`);
+            return;
+        }
+    }
 
-    // Resize any oversized images in the project directory
     let resizedCount = 0;
     const allImageDirs = ['images', 'imports/images', 'videos', 'imports', 'uploads', '.'].map(d => path.join(projectPath, d));
     for (const dir of allImageDirs) {
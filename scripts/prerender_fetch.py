@@ -0,0 +1,718 @@
+#!/usr/bin/env python3
+"""
+Pre-render fetch stage (asyncio).
+
+Downloads every remote media URL a project still depends on (OTIO
+target_urls, selected resources.json results without a local file), then
+points the OTIO and resources.json at the local copies. Python counterpart of
+scripts/pre-render-download.js, built for large stock videos on flaky links:
+
+  - pooled keep-alive HTTP/1.1 connections with a per-host cap, shared
+    across redirects and projects
+  - partial downloads stay in <dest>.tmp and resume with a Range request
+    (guarded by If-Range when the server sent an ETag)
+  - completed files are validated against Content-Length / Content-Range and
+    recorded with their ETag in <project>/.prerender-fetch.json, so reruns
+    skip them without the old ">10KB" guess
+  - transient failures (timeouts, resets, 429, 5xx) retry with exponential
+    backoff; other HTTP errors fail fast
+  - files come from / go into the shared media cache (media_cache.py)
+  - each URL is downloaded at most once per run; other destinations of the
+    same URL (in this or another project) get a hardlink or copy
+
+Usage:
+  python3 scripts/prerender_fetch.py [project-id ...]
+  python3 scripts/prerender_fetch.py my-project --per-host 2 --retries 8
+  python3 scripts/prerender_fetch.py --revalidate        # re-check cached files with HEAD
+"""
+
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import shutil
+import ssl
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+from json_stream import (
+    RESOURCE_CATEGORIES, apply_edits, encode_value, insert_members, iter_target_urls,
+    iter_values, read_span, rewrite_target_urls,
+)
+from media_cache import DEFAULT_CACHE_DIR, MediaCache, hash_file, parse_size
+from project_files import PROJECTS_DIR, atomic_write_text, dump_json, iter_projects
+
+STATE_FILE = '.prerender-fetch.json'
+CHUNK_SIZE = 1 << 16
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+USER_AGENT = 'vibedio-prerender-fetch/1.0'
+
+_MEDIA_EXT = re.compile(r'\.(mp4|webm|mov|m4v|jpg|jpeg|png|gif|webp)($|\?)', re.I)
+_IMAGE_EXT = re.compile(r'\.(jpg|jpeg|png|gif|webp)$', re.I)
+
+
+def is_remote_url(url):
+    return isinstance(url, str) and re.match(r'^https?://', url, re.I) is not None
+
+
+def is_media_url(url):
+    return _MEDIA_EXT.search(url) is not None
+
+
+def get_extension(url):
+    m = _MEDIA_EXT.search(url)
+    return '.' + m.group(1).lower() if m else '.mp4'
+
+
+def link_or_copy(src, dest):
+    """Make dest a hardlink (or, across devices, a copy) of src, atomically."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    if dest.exists() and os.path.samefile(src, dest):
+        return
+    tmp = dest.with_name(f'.{dest.name}.{os.getpid()}.tmp')
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copy2(src, tmp)
+    os.replace(tmp, dest)
+
+
+class TransientError(Exception):
+    """Failure worth retrying (network, timeout, 429/5xx, short body)."""
+
+
+class PermanentError(Exception):
+    """Failure that a retry will not fix (4xx, bad redirect)."""
+
+
+# ─── HTTP/1.1 client with keep-alive pools ──────────────────────────────────
+
+class _Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.reused = False
+
+    def close(self):
+        self.writer.close()
+
+
+class Response:
+    """A response whose body must be consumed (or discarded) before release()."""
+
+    def __init__(self, client, pool, conn, method, status, headers):
+        self.client = client
+        self.pool = pool
+        self.conn = conn
+        self.status = status
+        self.headers = headers
+        self._reusable = headers.get('connection', '').lower() != 'close'
+        self._done = method == 'HEAD' or status in (204, 304) or 100 <= status < 200
+
+    async def _read(self, coro):
+        return await asyncio.wait_for(coro, self.client.timeout)
+
+    async def iter_body(self):
+        if self._done:
+            return
+        reader = self.conn.reader
+        if 'chunked' in self.headers.get('transfer-encoding', '').lower():
+            while True:
+                line = await self._read(reader.readline())
+                if not line:
+                    raise TransientError('Connection closed inside chunked body')
+                size = int(line.split(b';')[0].strip() or b'0', 16)
+                if size == 0:
+                    while (await self._read(reader.readline())) not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                while size:
+                    data = await self._read(reader.read(min(size, CHUNK_SIZE)))
+                    if not data:
+                        raise TransientError('Connection closed inside chunk')
+                    size -= len(data)
+                    yield data
+                await self._read(reader.readexactly(2))
+        elif 'content-length' in self.headers:
+            remaining = int(self.headers['content-length'])
+            while remaining:
+                data = await self._read(reader.read(min(remaining, CHUNK_SIZE)))
+                if not data:
+                    raise TransientError(f'Connection closed with {remaining} bytes left')
+                remaining -= len(data)
+                yield data
+        else:
+            self._reusable = False
+            while True:
+                data = await self._read(reader.read(CHUNK_SIZE))
+                if not data:
+                    break
+                yield data
+        self._done = True
+
+    async def discard(self):
+        async for _ in self.iter_body():
+            pass
+
+    def release(self):
+        """Return the connection to its pool (or close it if the body was not drained)."""
+        if self.conn is not None:
+            self.pool.release(self.conn, self._done and self._reusable)
+            self.conn = None
+
+
+class _HostPool:
+    def __init__(self, scheme, host, port, limit, ssl_context):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context
+        self.slots = asyncio.Semaphore(limit)
+        self.idle = []
+        self.opened = 0
+
+    async def acquire(self, timeout):
+        await self.slots.acquire()
+        while self.idle:
+            conn = self.idle.pop()
+            if not conn.reader.at_eof() and not conn.writer.is_closing():
+                conn.reused = True
+                return conn
+            conn.close()
+        try:
+            return await self.connect(timeout)
+        except BaseException:
+            self.slots.release()
+            raise
+
+    async def connect(self, timeout):
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(
+            self.host, self.port,
+            ssl=self.ssl_context if self.scheme == 'https' else None,
+            server_hostname=self.host if self.scheme == 'https' else None,
+            limit=CHUNK_SIZE * 4,
+        ), timeout)
+        self.opened += 1
+        return _Connection(reader, writer)
+
+    def release(self, conn, reusable):
+        if reusable:
+            self.idle.append(conn)
+        else:
+            conn.close()
+        self.slots.release()
+
+    def close(self):
+        for conn in self.idle:
+            conn.close()
+        self.idle.clear()
+
+
+class HttpClient:
+    """Minimal asyncio HTTP/1.1 client: keep-alive pools, per-host limits."""
+
+    def __init__(self, per_host=4, timeout=30.0):
+        self.per_host = per_host
+        self.timeout = timeout
+        self.pools = {}
+        self.ssl_context = ssl.create_default_context()
+
+    def _pool(self, url):
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key = (scheme, parts.hostname, port)
+        if key not in self.pools:
+            self.pools[key] = _HostPool(scheme, parts.hostname, port, self.per_host, self.ssl_context)
+        return self.pools[key]
+
+    async def request(self, method, url, headers=None):
+        """Send a request and read the response head. Caller must release()."""
+        parts = urlsplit(url)
+        target = parts.path or '/'
+        if parts.query:
+            target += '?' + parts.query
+        host = parts.netloc.rsplit('@', 1)[-1]
+        lines = [f'{method} {target} HTTP/1.1', f'Host: {host}', f'User-Agent: {USER_AGENT}',
+                 'Accept: */*', 'Accept-Encoding: identity', 'Connection: keep-alive']
+        lines += [f'{k}: {v}' for k, v in (headers or {}).items()]
+        payload = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+        pool = self._pool(url)
+        for attempt in (1, 2):
+            conn = await pool.acquire(self.timeout)
+            try:
+                conn.writer.write(payload)
+                await asyncio.wait_for(conn.writer.drain(), self.timeout)
+                status, response_headers = await self._read_head(conn)
+                return Response(self, pool, conn, method, status, response_headers)
+            except (ConnectionError, asyncio.IncompleteReadError, TransientError) as e:
+                pool.release(conn, False)
+                # A pooled keep-alive connection may have been closed by the
+                # server while idle: retry once on a fresh one.
+                if not conn.reused or attempt == 2:
+                    raise TransientError(f'{type(e).__name__}: {e}') from e
+            except BaseException:
+                pool.release(conn, False)
+                raise
+
+    async def _read_head(self, conn):
+        raw = await asyncio.wait_for(conn.reader.readuntil(b'\r\n\r\n'), self.timeout)
+        head = raw.decode('latin-1').split('\r\n')
+        status_parts = head[0].split(' ', 2)
+        if len(status_parts) < 2 or not status_parts[0].startswith('HTTP/'):
+            raise TransientError(f'Malformed status line: {head[0]!r}')
+        headers = {}
+        for line in head[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        return int(status_parts[1]), headers
+
+    def close(self):
+        for pool in self.pools.values():
+            pool.close()
+
+
+# ─── Resumable, validated downloads ──────────────────────────────────────────
+
+class Fetcher:
+    def __init__(self, client, retries=5, backoff=1.0, max_connections=16, cache=None, revalidate=False):
+        self.client = client
+        self.retries = retries
+        self.backoff = backoff
+        self.slots = asyncio.Semaphore(max_connections)
+        self.cache = cache
+        self.revalidate = revalidate
+        self.bytes_downloaded = 0
+        # url -> future of (local path, state) for a complete copy, or None
+        # when the download failed; shared by every destination in the run
+        self.sources = {}
+
+    def _remember(self, url, dest, state):
+        if url not in self.sources:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result((dest, dict(state)))
+            self.sources[url] = future
+
+    async def head(self, url):
+        for _ in range(MAX_REDIRECTS + 1):
+            resp = await self.client.request('HEAD', url)
+            resp.release()
+            if resp.status in REDIRECT_STATUSES and 'location' in resp.headers:
+                url = urljoin(url, resp.headers['location'])
+                continue
+            return resp.status, resp.headers
+        raise PermanentError(f'Too many redirects for {url}')
+
+    async def fetch(self, url, dest, state):
+        """Make dest a complete copy of url. state is the file's entry in the
+        project fetch state (updated in place). Returns 'cached', 'linked' or
+        'downloaded'; raises on failure.
+        """
+        dest = Path(dest)
+        if dest.exists() and state.get('complete') and state.get('url') == url \
+                and state.get('length') == dest.stat().st_size:
+            if not self.revalidate or await self._still_current(url, state):
+                self._remember(url, dest, state)
+                return 'cached'
+
+        if dest.exists() and not state.get('complete'):
+            # Downloaded by another tool: accept it if the server agrees on size.
+            status, headers = await self.head(url)
+            length = headers.get('content-length')
+            if status == 200 and (length is None or int(length) == dest.stat().st_size):
+                state.update(url=url, etag=headers.get('etag'), length=dest.stat().st_size, complete=True)
+                self._remember(url, dest, state)
+                return 'cached'
+
+        # Same URL already fetched (or being fetched) for another destination.
+        # A failed attempt removes itself, so the loop then falls through to
+        # a download of our own.
+        while url in self.sources:
+            source = await self.sources[url]
+            if source is not None:
+                link_or_copy(source[0], dest)
+                state.clear()
+                state.update(source[1])
+                return 'linked'
+
+        if self.cache is not None:
+            hit = self.cache.lookup(url)
+            if hit:
+                self.cache.link(hit[0].stem, dest)
+                state.update(url=url, etag=hit[1], length=dest.stat().st_size, complete=True)
+                self._remember(url, dest, state)
+                return 'linked'
+
+        future = asyncio.get_running_loop().create_future()
+        self.sources[url] = future
+        try:
+            await self._download_to(url, dest, state)
+        except BaseException:
+            del self.sources[url]
+            future.set_result(None)
+            raise
+        future.set_result((dest, dict(state)))
+        return 'downloaded'
+
+    async def _download_to(self, url, dest, state):
+        tmp = dest.with_name(dest.name + '.tmp')
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.slots:
+                    await self._download(url, tmp, state)
+                break
+            except PermanentError:
+                if tmp.exists():
+                    tmp.unlink()
+                state.clear()
+                raise
+            except (TransientError, OSError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    raise TransientError(f'{e or type(e).__name__} (after {attempt + 1} attempts, '
+                                         f'{tmp.stat().st_size if tmp.exists() else 0} bytes kept for resume)')
+                delay = self.backoff * (2 ** attempt) * (0.5 + random.random())
+                await asyncio.sleep(delay)
+
+        os.replace(tmp, dest)
+        state['complete'] = True
+        if self.cache is not None:
+            # Hashing and copying a large video must not block the event
+            # loop (other downloads would hit their timeouts): both run in a
+            # thread, the index update stays here (SQLite connections are
+            # per-thread).
+            digest = await asyncio.to_thread(hash_file, dest)
+            staged = await asyncio.to_thread(self.cache.stage, dest)
+            self.cache.add_file(staged, url=url, etag=state.get('etag'), move=True, digest=digest)
+            self.cache.link(digest, dest)
+
+    async def _still_current(self, url, state):
+        status, headers = await self.head(url)
+        if status != 200:
+            return True  # can't tell; keep what we have
+        if state.get('etag') and headers.get('etag'):
+            return headers['etag'] == state['etag']
+        length = headers.get('content-length')
+        return length is None or int(length) == state.get('length')
+
+    async def _download(self, url, tmp, state):
+        original_url = url
+        offset = tmp.stat().st_size if tmp.exists() else 0
+        if offset and state.get('url') != original_url:
+            offset = 0  # partial belongs to another URL
+
+        for _ in range(MAX_REDIRECTS + 1):
+            headers = {}
+            if offset:
+                headers['Range'] = f'bytes={offset}-'
+                if state.get('etag'):
+                    headers['If-Range'] = state['etag']
+            resp = await self.client.request('GET', url, headers)
+            try:
+                if resp.status in REDIRECT_STATUSES:
+                    if 'location' not in resp.headers:
+                        raise PermanentError(f'HTTP {resp.status} without Location for {url}')
+                    await resp.discard()
+                    url = urljoin(url, resp.headers['location'])
+                    continue
+                if resp.status == 416:
+                    await resp.discard()
+                    offset = 0
+                    continue
+                if resp.status == 429 or resp.status >= 500:
+                    raise TransientError(f'HTTP {resp.status} for {url}')
+                if resp.status not in (200, 206):
+                    raise PermanentError(f'HTTP {resp.status} for {url}')
+
+                total = None
+                if resp.status == 206:
+                    m = re.match(r'bytes (\d+)-\d+/(\d+|\*)', resp.headers.get('content-range', ''))
+                    if not m or int(m.group(1)) != offset:
+                        raise TransientError(f'Unexpected Content-Range {resp.headers.get("content-range")!r}')
+                    total = int(m.group(2)) if m.group(2) != '*' else None
+                    mode = 'ab'
+                else:
+                    offset = 0
+                    if 'content-length' in resp.headers:
+                        total = int(resp.headers['content-length'])
+                    mode = 'wb'
+
+                state.update(url=original_url, etag=resp.headers.get('etag'), length=total, complete=False)
+                written = offset
+                with open(tmp, mode) as f:
+                    async for chunk in resp.iter_body():
+                        f.write(chunk)
+                        written += len(chunk)
+                        self.bytes_downloaded += len(chunk)
+                if total is not None and written != total:
+                    raise TransientError(f'Got {written} of {total} bytes for {url}')
+                state['length'] = written
+                return
+            finally:
+                resp.release()
+        raise PermanentError(f'Too many redirects for {original_url}')
+
+
+# ─── Project planning ────────────────────────────────────────────────────────
+
+def _remote_dest(url):
+    """Stable local name for an OTIO remote URL (independent of clip order)."""
+    ext = get_extension(url)
+    sub = 'images' if _IMAGE_EXT.search(ext) else 'videos'
+    return f'{sub}/remote_{hashlib.sha1(url.encode()).hexdigest()[:12]}{ext}'
+
+
+def plan_otio(otio_path):
+    """Unique remote media target_urls in an OTIO file."""
+    urls = []
+    for m in iter_target_urls(otio_path):
+        if is_remote_url(m.value) and is_media_url(m.value) and m.value not in urls:
+            urls.append(m.value)
+    return urls
+
+
+def plan_resources(res_path):
+    """Selected (or rank 1) results that still need a download.
+
+    Mirrors collectUrlsFromResources in pre-render-download.js. Returns a
+    list of dicts with url, id, scene and the result's byte span.
+    """
+    patterns = []
+    for category in RESOURCE_CATEGORIES:
+        base = ('resources', category, '*')
+        patterns += [base + ('sceneId',), base + ('selectedResourceIds',),
+                     base + ('selectedResourceId',), base + ('results', '*')]
+    groups = {}
+    for m in iter_values(res_path, *patterns):
+        group = groups.setdefault(m.path[:3], {'selected': [], 'candidates': [], 'scene': None})
+        field = m.path[3]
+        if field == 'sceneId':
+            group['scene'] = m.value
+        elif field == 'selectedResourceIds':
+            if isinstance(m.value, list) and m.value:
+                group['selected'] = m.value
+        elif field == 'selectedResourceId':
+            if m.value and not group['selected']:
+                group['selected'] = [m.value]
+        elif isinstance(m.value, dict):
+            r = m.value
+            if r.get('importedPath') or r.get('relativePath') or r.get('localPath'):
+                continue
+            urls = r.get('downloadUrls') if isinstance(r.get('downloadUrls'), dict) else {}
+            url = r.get('downloadUrl') or urls.get('hd') or urls.get('large') or urls.get('medium') or urls.get('sd')
+            if is_remote_url(url) and is_media_url(url):
+                group['candidates'].append({'rank': m.path[4], 'id': r.get('id'), 'url': url,
+                                            'start': m.start, 'end': m.end})
+
+    planned = []
+    for group in groups.values():
+        for c in group['candidates']:
+            if (c['id'] in group['selected']) if group['selected'] else c['rank'] == 0:
+                c['scene'] = group['scene']
+                planned.append(c)
+    return planned
+
+
+def resource_dest(c):
+    """Project-relative download path of a planned resources.json result."""
+    ext = get_extension(c['url'])
+    sub = 'images' if _IMAGE_EXT.search(ext) else 'videos'
+    return f"{sub}/{c['id'] or 'res_' + hashlib.sha1(c['url'].encode()).hexdigest()[:8]}{ext}"
+
+
+def _file_version(path):
+    st = path.stat()
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def patch_resources(project_dir, res_path, done, attempts=3):
+    """Record localPath/relativePath on results whose download is in done.
+
+    Spans are planned again here instead of reusing the ones from before the
+    downloads: the planner or Studio may have saved resources.json in the
+    meantime. Results are matched by destination (id + URL). Returns the
+    number of edits applied.
+    """
+    for _ in range(attempts):
+        version = _file_version(res_path)
+        edits = []
+        for c in plan_resources(res_path):
+            rel = resource_dest(c)
+            if rel in done:
+                raw = read_span(res_path, c['start'], c['end'])
+                edits += local_path_edits(raw, c['start'], {'localPath': str(project_dir / rel), 'relativePath': rel})
+        if not edits:
+            return 0
+        if _file_version(res_path) == version:
+            return apply_edits(res_path, edits)
+    raise OSError(f'{res_path.name} kept changing while being patched')
+
+
+def load_state(project_dir):
+    try:
+        with open(project_dir / STATE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def local_path_edits(raw, start, members):
+    """Edits setting members on the JSON object raw (at offset start).
+
+    Keys the object already has (e.g. "localPath": null) get their value
+    replaced in place; only missing keys are appended.
+    """
+    edits = []
+    missing = dict(members)
+    for m in iter_values(io.BytesIO(raw), *((key,) for key in members)):
+        key = m.path[0]
+        if key in missing:
+            edits.append((start + m.start, start + m.end, encode_value(missing.pop(key))))
+    if missing:
+        edits.append(insert_members(raw, start, missing))
+    return edits
+
+
+async def process_project(project_dir, fetcher):
+    project_dir = Path(project_dir)
+    print(f'\n📁 Project: {project_dir.name}')
+    state = load_state(project_dir)
+    saved_state = dump_json(state)
+    jobs = {}  # relative dest -> url
+
+    otio_urls = {}
+    for otio_path in sorted(project_dir.glob('*.otio')):
+        try:
+            urls = plan_otio(otio_path)
+        except ValueError as e:
+            print(f'  ⚠️  Failed to read {otio_path.name}: {e}')
+            continue
+        print(f'  📼 {otio_path.name}: {len(urls)} remote media URLs found')
+        otio_urls[otio_path] = urls
+        for url in urls:
+            jobs.setdefault(_remote_dest(url), url)
+
+    res_path = project_dir / 'resources.json'
+    resource_plan = []
+    if res_path.exists():
+        try:
+            resource_plan = plan_resources(res_path)
+        except ValueError as e:
+            print(f'  ⚠️  Failed to read resources.json: {e}')
+        print(f'  🌐 resources.json: {len(resource_plan)} remote resources without local path')
+        for c in resource_plan:
+            jobs.setdefault(resource_dest(c), c['url'])
+
+    if not jobs:
+        print('  ✅ All resources are already local')
+        return {'downloaded': 0, 'cached': 0, 'failed': 0}
+
+    async def run(rel, url):
+        entry = state.setdefault(rel, {})
+        try:
+            outcome = await fetcher.fetch(url, project_dir / rel, entry)
+            print(f'  {"⬇️ " if outcome == "downloaded" else "✓"} {rel} ({outcome})')
+            return rel, outcome
+        except (TransientError, PermanentError, OSError, asyncio.TimeoutError) as e:
+            print(f'  ✗ {rel}: {e}')
+            return rel, 'failed'
+
+    try:
+        outcomes = dict(await asyncio.gather(*(run(rel, url) for rel, url in jobs.items())))
+    finally:
+        # Only write when something changed, so a no-op rerun leaves the
+        # project directory (and its mtime) alone
+        new_state = dump_json({k: v for k, v in state.items() if v})
+        if new_state != saved_state:
+            atomic_write_text(project_dir / STATE_FILE, new_state)
+    ok = {rel for rel, outcome in outcomes.items() if outcome != 'failed'}
+
+    counts = {'downloaded': 0, 'cached': 0, 'failed': 0}
+    for outcome in outcomes.values():
+        counts['cached' if outcome == 'linked' else outcome] += 1
+
+    # Point the OTIO files and resources.json at the local copies (only for
+    # URLs that made it). Both are re-read now, not patched from the spans
+    # planned before the downloads. A failure here fails this project only.
+    try:
+        for otio_path, urls in otio_urls.items():
+            url_map = {url: _remote_dest(url) for url in urls if _remote_dest(url) in ok}
+            if url_map and rewrite_target_urls(otio_path, url_map):
+                print(f'  ✏️  {otio_path.name} patched with local paths')
+        if resource_plan and patch_resources(project_dir, res_path, ok):
+            print('  💾 resources.json updated with local paths')
+    except (OSError, ValueError) as e:
+        print(f'  ✗ Failed to record local paths: {e}')
+        counts['failed'] += 1
+    print(f"  📊 Downloaded: {counts['downloaded']}, Cached: {counts['cached']}, Failed: {counts['failed']}")
+    return counts
+
+
+async def run_projects(projects, per_host=4, max_connections=16, retries=5, backoff=1.0,
+                       timeout=30.0, cache_dir=None, revalidate=False, cache_max_bytes=None):
+    """Fetch media for the given project directories. Returns total counts."""
+    client = HttpClient(per_host=per_host, timeout=timeout)
+    cache = MediaCache(cache_dir, max_bytes=cache_max_bytes) if cache_dir else None
+    fetcher = Fetcher(client, retries=retries, backoff=backoff, max_connections=max_connections,
+                      cache=cache, revalidate=revalidate)
+    totals = {'downloaded': 0, 'cached': 0, 'failed': 0}
+    try:
+        for counts in await asyncio.gather(*(process_project(p, fetcher) for p in projects)):
+            for key in totals:
+                totals[key] += counts[key]
+    finally:
+        client.close()
+        if cache is not None:
+            cache.close()
+    totals['bytes'] = fetcher.bytes_downloaded
+    totals['connections'] = sum(pool.opened for pool in client.pools.values())
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Download remote project media before rendering.')
+    parser.add_argument('projects', nargs='*', help='project ids (default: all)')
+    parser.add_argument('--projects-dir', default=str(PROJECTS_DIR))
+    parser.add_argument('--per-host', type=int, default=4, help='connections per host (default: 4)')
+    parser.add_argument('--max-connections', type=int, default=16, help='total concurrent downloads')
+    parser.add_argument('--retries', type=int, default=5)
+    parser.add_argument('--backoff', type=float, default=1.0, help='base retry delay in seconds')
+    parser.add_argument('--timeout', type=float, default=30.0, help='socket idle timeout in seconds')
+    parser.add_argument('--cache-dir', default=str(DEFAULT_CACHE_DIR))
+    parser.add_argument('--no-cache', action='store_true', help='do not use the shared media cache')
+    parser.add_argument('--cache-max-size', type=parse_size,
+                        help='LRU-evict the media cache down to this size after inserts, e.g. 20G '
+                             '(default: $VIBEDIO_MEDIA_CACHE_MAX_SIZE)')
+    parser.add_argument('--revalidate', action='store_true', help='HEAD-check completed files for changes')
+    args = parser.parse_args(argv)
+
+    projects = list(iter_projects(args.projects_dir, args.projects))
+    if not projects:
+        print(f'Project not found: {" ".join(args.projects)}' if args.projects else 'No projects found')
+        return 1
+
+    print(f'🚀 Pre-render fetch: {len(projects)} project(s)')
+    print(f'   {args.per_host} connection(s) per host, {args.max_connections} total')
+    started = time.monotonic()
+    totals = asyncio.run(run_projects(
+        projects, per_host=args.per_host, max_connections=args.max_connections, retries=args.retries,
+        backoff=args.backoff, timeout=args.timeout, cache_dir=None if args.no_cache else args.cache_dir,
+        revalidate=args.revalidate, cache_max_bytes=args.cache_max_size,
+    ))
+    print(f"\n✅ Done in {time.monotonic() - started:.1f}s — downloaded {totals['downloaded']} "
+          f"({totals['bytes'] / 1048576:.1f}MB over {totals['connections']} connection(s)), "
+          f"cached {totals['cached']}, failed {totals['failed']}")
+    return 1 if totals['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
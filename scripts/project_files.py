@@ -0,0 +1,93 @@
+"""
+Shared helpers for the Python pre-render tooling.
+
+Project discovery and atomic file writes used by repair-resources.py and the
+other scripts/ tools. Paths mirror scripts/generate-project-list.js.
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+PUBLIC_DIR = ROOT_DIR / 'public'
+PROJECTS_DIR = PUBLIC_DIR / 'projects'
+
+
+def iter_projects(projects_dir=PROJECTS_DIR, only=None):
+    """Yield project directories under projects_dir, sorted by name.
+
+    Hidden entries are skipped, like generate-project-list.js does.
+    `only` restricts the result to the given project ids.
+    """
+    projects_dir = Path(projects_dir)
+    if not projects_dir.is_dir():
+        return
+    wanted = set(only) if only else None
+    for entry in sorted(os.scandir(projects_dir), key=lambda e: e.name):
+        if entry.name.startswith('.') or not entry.is_dir():
+            continue
+        if wanted is not None and entry.name not in wanted:
+            continue
+        yield Path(entry.path)
+
+
+def atomic_write_bytes(path, data):
+    """Write data to path via a temp file in the same directory + rename.
+
+    Readers (Remotion Studio polling, the planner server) never see a
+    half-written file, and a crash leaves the original untouched.
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f'.{path.name}.', suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        if path.exists():
+            os.chmod(tmp_path, path.stat().st_mode & 0o777)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def atomic_write_text(path, text):
+    atomic_write_bytes(path, text.encode('utf-8'))
+
+
+def dump_json(data):
+    """Serialize the way the JS tools do (JSON.stringify(data, null, 2))."""
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def resolve_local_path(project_dir, local_path):
+    """Map a resource localPath/relativePath to a file on this machine.
+
+    Handles the three forms found in resources.json: absolute paths written
+    by pre-render-download.js, absolute paths from another machine that
+    still contain public/projects/<id>/..., and project-relative paths.
+    """
+    normalized = local_path.replace('\\', '/')
+    marker = normalized.lower().rfind('public/projects/')
+    if os.path.isabs(normalized) and (marker < 0 or os.path.exists(normalized)):
+        return Path(normalized)
+    if marker >= 0:
+        return Path(project_dir).parent / normalized[marker + len('public/projects/'):]
+    return Path(project_dir) / normalized.lstrip('/')
+
+
+def resource_urls(resource):
+    """Remote URLs a resources.json result can be fetched from, best first."""
+    urls = []
+    if resource.get('downloadUrl'):
+        urls.append(resource['downloadUrl'])
+    download_urls = resource.get('downloadUrls')
+    if isinstance(download_urls, dict):
+        for key in ('4k', 'hd', 'large', 'medium', 'original', 'sd'):
+            if download_urls.get(key):
+                urls.append(download_urls[key])
+    if resource.get('url'):
+        urls.append(resource['url'])
+    return [u for u in urls if isinstance(u, str) and u.startswith(('http://', 'https://'))]
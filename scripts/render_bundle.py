@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Build a minimal public/ directory for rendering one project.
+
+Remotion copies the whole public dir into a temp bundle before every render,
+so a project render also pays for every other project and every unselected
+Pexels candidate (docs/render-optimization.md §2.6). This tool computes the
+files a project actually references:
+
+  - the project's script.json / resources.json / .otio / render-manifest.json
+  - every target_url in the resolved timeline (build_manifest.py), including
+    media forced from resources.json and files of other projects
+  - media paths inside clip metadata props (SFX such as /audio/click.mp3,
+    music passed to effects)
+  - selected resources.json results and music / audio / sfx downloads
+
+and mirrors them into a staging directory made of hardlinks (copies only
+across filesystems). Files no longer referenced are removed from the
+staging dir on the next run, so it can be reused.
+
+Usage:
+  python3 scripts/render_bundle.py my-project
+  npx remotion render Preview-Portrait out.mp4 --public-dir .render-bundle/my-project \\
+      --props '{"projectId":"my-project"}'
+
+  python3 scripts/render_bundle.py my-project --unused   # list unreferenced project files
+"""
+
+import argparse
+import errno
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from pathlib import Path
+
+from build_manifest import MANIFEST_FILE, load_manifest, local_resources_by_scene, read_json, source_files
+from media_cache import format_size
+from project_files import PROJECTS_DIR, PUBLIC_DIR, ROOT_DIR, iter_projects
+
+DEFAULT_BUNDLE_DIR = ROOT_DIR / '.render-bundle'
+AUDIO_CATEGORIES = ('music', 'audio', 'sfx', 'voice')
+DEFAULT_COMPOSITION = 'Preview-Portrait'
+
+_MEDIA_PATH = re.compile(
+    r'\.(mp4|webm|mov|m4v|jpg|jpeg|png|gif|webp|svg|mp3|wav|m4a|aac|ogg|json|ttf|otf|woff2?)($|\?)', re.I)
+_REMOTE = re.compile(r'^(https?:|data:|blob:)', re.I)
+
+
+def _candidates(project_dir, value):
+    """Public-relative paths a media string may point to, most likely first."""
+    value = value.replace('\\', '/').split('?')[0]
+    if value.startswith('file://'):
+        index = value.find('/public/')
+        return [value[index + len('/public/'):]] if index != -1 else []
+    m = re.search(r'public/(.+)', value)
+    if m:
+        return [m.group(1)]
+    if value.startswith('/'):
+        # sanitizeUrl maps /audio/... to public/audio; the loader treats other
+        # leading slashes as project-relative.
+        return [value.lstrip('/'), f'projects/{project_dir.name}/{value.lstrip("/")}']
+    own = f'projects/{project_dir.name}/{value}'
+    return [own, value]
+
+
+def _walk_strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _walk_strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _walk_strings(item)
+
+
+def _selected_local_paths(resources, script):
+    """Local paths of selected resources.json results and audio downloads."""
+    selected = set()
+    scenes = (script or {}).get('scenes') or [
+        scene for section in (script or {}).get('sections') or [] for scene in (section or {}).get('scenes') or []]
+    for scene in scenes:
+        ids = (scene or {}).get('selectedResourceIds') or []
+        selected.update(ids if isinstance(ids, list) else [])
+        if (scene or {}).get('selectedResourceId'):
+            selected.add(scene['selectedResourceId'])
+
+    for results in local_resources_by_scene(resources).values():
+        for result in results:
+            if isinstance(result, dict) and (result.get('id') in selected or result.get('type') == 'pinned'):
+                yield from (result.get(k) for k in ('importedPath', 'relativePath', 'localPath') if result.get(k))
+
+    groups = (resources or {}).get('resources') if isinstance(resources, dict) else None
+    for category in AUDIO_CATEGORIES:
+        for entry in (groups or {}).get(category) or []:
+            if not isinstance(entry, dict):
+                continue
+            for item in [entry] + list(entry.get('results') or []):
+                if isinstance(item, dict):
+                    yield from (item.get(k) for k in ('importedPath', 'relativePath', 'localPath') if item.get(k))
+
+
+def referenced_files(project_dir, public_dir=PUBLIC_DIR):
+    """Compute the files a project render reads.
+
+    Returns (files, missing): files maps public-relative paths to absolute
+    paths, missing lists referenced local paths that do not exist.
+    """
+    project_dir = Path(project_dir)
+    public_dir = Path(public_dir)
+    files = {}
+    missing = set()
+
+    def add(value):
+        if not isinstance(value, str) or not value or _REMOTE.match(value):
+            return
+        candidates = _candidates(project_dir, value)
+        for rel in candidates:
+            path = public_dir / rel
+            if path.is_file():
+                files[rel] = path
+                return
+        if candidates:
+            missing.add(candidates[0])
+
+    manifest = load_manifest(project_dir)
+    for name in source_files(project_dir) + ([MANIFEST_FILE] if manifest else []):
+        add(name)
+    if manifest:
+        for value in _walk_strings(manifest.get('timeline')):
+            if _MEDIA_PATH.search(value):
+                add(value)
+
+    script = read_json(project_dir / 'script.json')
+    resources = read_json(project_dir / 'resources.json')
+    for value in _selected_local_paths(resources, script):
+        add(value)
+    return files, sorted(missing)
+
+
+def _tree_size(root):
+    total = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _link_or_copy(src, dest):
+    tmp = dest.with_name(f'.{dest.name}.bundle.tmp')
+    if tmp.exists():
+        tmp.unlink()
+    try:
+        os.link(src, tmp)
+        linked = True
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+            raise
+        shutil.copy2(src, tmp)
+        linked = False
+    os.replace(tmp, dest)
+    return linked
+
+
+def build_bundle(project_dir, bundle_dir, public_dir=PUBLIC_DIR, dry_run=False):
+    """Mirror a project's referenced files into bundle_dir.
+
+    Returns a stats dict (files, bytes, linked, copied, removed, missing).
+    """
+    files, missing = referenced_files(project_dir, public_dir)
+    bundle_dir = Path(bundle_dir)
+    stats = {'files': len(files), 'bytes': 0, 'linked': 0, 'copied': 0, 'unchanged': 0,
+             'removed': 0, 'missing': missing}
+    for rel, src in sorted(files.items()):
+        st = src.stat()
+        stats['bytes'] += st.st_size
+        dest = bundle_dir / rel
+        try:
+            dst = dest.stat()
+            if (dst.st_ino, dst.st_dev) == (st.st_ino, st.st_dev) or \
+                    (dst.st_size, dst.st_mtime_ns) == (st.st_size, st.st_mtime_ns):
+                stats['unchanged'] += 1
+                continue
+        except FileNotFoundError:
+            pass
+        if dry_run:
+            continue
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        stats['linked' if _link_or_copy(src, dest) else 'copied'] += 1
+
+    if bundle_dir.is_dir():
+        keep = {str(bundle_dir / rel) for rel in files}
+        for dirpath, dirnames, filenames in os.walk(bundle_dir, topdown=False):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                if path not in keep:
+                    stats['removed'] += 1
+                    if not dry_run:
+                        os.unlink(path)
+            if not dry_run and dirpath != str(bundle_dir) and not os.listdir(dirpath):
+                os.rmdir(dirpath)
+    return stats
+
+
+def unused_files(project_dir, public_dir=PUBLIC_DIR):
+    """Files inside the project dir that a render never reads, largest first."""
+    project_dir = Path(project_dir)
+    files, _ = referenced_files(project_dir, public_dir)
+    used = {path.resolve() for path in files.values()}
+    unused = []
+    for dirpath, dirnames, filenames in os.walk(project_dir):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        for name in filenames:
+            path = Path(dirpath) / name
+            if name.startswith('.') or path.resolve() in used or not _MEDIA_PATH.search(name):
+                continue
+            unused.append((path.stat().st_size, path.relative_to(project_dir).as_posix()))
+    return sorted(unused, reverse=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build a minimal public dir for rendering one project.')
+    parser.add_argument('projects', nargs='+', help='project id(s)')
+    parser.add_argument('--projects-dir', default=str(PROJECTS_DIR))
+    parser.add_argument('--public-dir', default=None, help='public root (default: parent of --projects-dir)')
+    parser.add_argument('--bundle-dir', default=str(DEFAULT_BUNDLE_DIR),
+                        help='staging root; each project gets <bundle-dir>/<id> (default: %(default)s)')
+    parser.add_argument('--composition', default=DEFAULT_COMPOSITION, help='composition for the printed command')
+    parser.add_argument('--dry-run', action='store_true', help='report only, do not touch the staging dir')
+    parser.add_argument('--unused', action='store_true', help='list project files no render references')
+    parser.add_argument('--json', action='store_true', help='print stats as JSON')
+    args = parser.parse_args(argv)
+
+    public_dir = Path(args.public_dir) if args.public_dir else Path(args.projects_dir).parent
+    projects = list(iter_projects(args.projects_dir, args.projects))
+    if not projects:
+        print(f'No matching projects in {args.projects_dir}')
+        return 1
+
+    if args.unused:
+        for project_dir in projects:
+            unused = unused_files(project_dir, public_dir)
+            for size, rel in unused:
+                print(f'  {format_size(size):>9}  {project_dir.name}/{rel}')
+            print(f'🧹 {project_dir.name}: {len(unused)} unreferenced file(s), '
+                  f'{format_size(sum(s for s, _ in unused))}')
+        return 0
+
+    public_total = _tree_size(public_dir)
+    report = {}
+    for project_dir in projects:
+        started = time.monotonic()
+        bundle_dir = Path(args.bundle_dir) / project_dir.name
+        stats = build_bundle(project_dir, bundle_dir, public_dir, args.dry_run)
+        stats['skippedBytes'] = max(0, public_total - stats['bytes'])
+        stats['bundleDir'] = str(bundle_dir)
+        stats['seconds'] = round(time.monotonic() - started, 3)
+        report[project_dir.name] = stats
+        if args.json:
+            continue
+        for rel in stats['missing']:
+            print(f'  ⚠️  missing {rel}')
+        print(f"📦 {project_dir.name}: {stats['files']} file(s), {format_size(stats['bytes'])} "
+              f"({stats['linked']} linked, {stats['copied']} copied, {stats['unchanged']} unchanged, "
+              f"{stats['removed']} removed); skipped {format_size(stats['skippedBytes'])} of public/")
+        props = json.dumps({'projectId': project_dir.name}, separators=(',', ':'))
+        print(f"   npx remotion render {args.composition} out/{project_dir.name}.mp4 "
+              f"--public-dir {bundle_dir} --props '{props}'")
+    if args.json:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
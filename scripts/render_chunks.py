@@ -0,0 +1,624 @@
+#!/usr/bin/env python3
+"""
+Render a composition in frame-range chunks that can be resumed and spread
+across processes or machines.
+
+A single `remotion render` of ~6000 frames runs for minutes and starts over
+after any delayRender timeout. This orchestrator:
+
+  - takes durationInFrames from render-manifest.json (build_manifest.py) or
+    --frames, and splits it into chunks recorded once in plan.json
+  - bundles once per version of the project (`remotion bundle`, on the
+    minimal public dir from render_bundle.py), then runs
+    `remotion render --frames=a-b` per chunk; plan.json and bundle.done
+    record the manifest `sources` fingerprint, so fixing a project file or
+    asset re-bundles on the next run; each chunk also records a hash of the
+    clips it covers, and only finished chunks whose clips, transitions or
+    media changed are rendered again
+  - sizes local workers by RAM with the same rule as remotion.config.ts
+    (60% of total RAM minus 2GB, ~700MB per Chromium tab, at most 8)
+  - claims chunks with O_EXCL lock files, so several machines sharing the
+    work dir (NFS/SMB) split the chunks between them; locks are refreshed
+    while a chunk renders and stolen once stale or their process is gone
+    (the bundle lock works the same way)
+  - checkpoints each finished chunk (chunks/NNNN.done) and retries only
+    failed or unfinished chunks on the next run
+  - concatenates the segments with ffmpeg's concat demuxer without
+    re-encoding video (chunks use h264-mkv with PCM audio, so only the
+    audio is encoded once, to AAC, without gaps between chunks)
+
+Usage:
+  python3 scripts/render_chunks.py my-project
+  python3 scripts/render_chunks.py my-project --composition Preview-Landscape --workers 3
+  python3 scripts/render_chunks.py my-project --status
+  python3 scripts/render_chunks.py my-project -- --log=verbose   # extra remotion flags
+
+On other machines, run the same command with --work-dir pointing at the
+shared directory.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from build_manifest import load_manifest
+from project_files import PROJECTS_DIR, ROOT_DIR, atomic_write_text, dump_json
+from render_bundle import build_bundle
+
+COMPOSITIONS = ('Preview-Portrait', 'Preview-Landscape', 'Preview-Square', 'Preview-4x5')
+DEFAULT_WORK_DIR = ROOT_DIR / '.render-chunks'
+PLAN_VERSION = 1
+
+MB = 1024 * 1024
+GB = 1024 * MB
+TAB_RAM = 700 * MB       # keep in sync with remotion.config.ts
+RESERVED_RAM = 2 * GB
+MAX_WORKERS = 8
+
+LOCK_TIMEOUT = 600       # seconds without heartbeat before a lock is stolen
+HEARTBEAT = 30
+POLL = 1.0
+HOST = socket.gethostname()
+
+
+def total_ram():
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        return 8 * GB
+
+
+def workers_by_ram(concurrency=1):
+    """Number of render processes this machine can run (remotion.config.ts rule)."""
+    usable = max(0, total_ram() * 0.6 - RESERVED_RAM)
+    by_ram = max(1, int(usable // (TAB_RAM * concurrency)))
+    return min(os.cpu_count() or 1, by_ram, MAX_WORKERS)
+
+
+def split_frames(frames, chunk_size):
+    """Inclusive (start, end) ranges covering frames 0..frames-1."""
+    return [(start, min(start + chunk_size, frames) - 1) for start in range(0, frames, chunk_size)]
+
+
+def chunk_inputs(manifest, chunks):
+    """Per-chunk hash of what the chunk's frames are rendered from, or None.
+
+    Covers the timeline-wide settings plus, for every clip overlapping the
+    chunk, its timeline item, frame range, adjacent transitions and the
+    size/mtime of its local media.
+    """
+    if not manifest:
+        return None
+    timeline = manifest.get('timeline') or {}
+    stack = timeline.get('tracks') or {}
+    tracks = stack.get('children') or []
+    media = (manifest.get('sources') or {}).get('media') or {}
+    common = {key: manifest.get(key) for key in ('fps', 'ratio', 'width', 'height', 'durationInFrames')}
+    common['timeline'] = {key: value for key, value in timeline.items() if key != 'tracks'}
+    common['stack'] = {key: value for key, value in stack.items() if key != 'children'}
+    common['tracks'] = [{key: value for key, value in track.items() if key != 'children'} for track in tracks]
+    clips = []
+    for clip in manifest.get('clips') or []:
+        items = tracks[clip['track']].get('children') or []
+        transitions = [items[i] for i in (clip['index'] - 1, clip['index'] + 1)
+                       if 0 <= i < len(items) and str(items[i].get('OTIO_SCHEMA', '')).startswith('Transition')]
+        start = clip['startFrame']
+        end = start + max(clip['durationFrames'], 1) - 1
+        clips.append((start, end, [clip, items[clip['index']], transitions, media.get(clip['src'])]))
+    hashes = []
+    for start, end in chunks:
+        parts = [common] + [part for clip_start, clip_end, part in clips if clip_start <= end and clip_end >= start]
+        hashes.append(hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:16])
+    return hashes
+
+
+def _create_exclusive(path, text):
+    """Create path with text only if it does not exist yet. Returns True if created."""
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return True
+
+
+def _read_text(path):
+    try:
+        return Path(path).read_text(encoding='utf-8')
+    except OSError:
+        return None
+
+
+def _read_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _touch(path):
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class RenderJob:
+    """Plan, locks and checkpoints of one project/composition render in a work dir."""
+
+    def __init__(self, work_dir, lock_timeout=LOCK_TIMEOUT):
+        self.root = Path(work_dir)
+        self.chunks_dir = self.root / 'chunks'
+        self.plan_path = self.root / 'plan.json'
+        self.lock_timeout = lock_timeout
+        self.plan = None
+
+    def load_or_create_plan(self, plan, manifest=None):
+        """Use the existing plan.json (first runner wins) or store this one.
+
+        When the manifest sources changed since planning, the plan takes the
+        new sources and chunk hashes, so finished chunks covering changed
+        clips count as pending again.
+        """
+        self.chunks_dir.mkdir(parents=True, exist_ok=True)
+        plan = {**plan, 'chunkInputs': chunk_inputs(manifest, plan['chunks'])}
+        if not _create_exclusive(self.plan_path, dump_json(plan)):
+            existing = _read_json(self.plan_path)
+            if not existing:
+                raise ValueError(f'{self.plan_path} is unreadable; delete it to re-plan')
+            for key in ('projectId', 'composition', 'frames'):
+                if existing.get(key) != plan.get(key):
+                    raise ValueError(f'{self.plan_path} was planned for {key}={existing.get(key)!r}, '
+                                     f'not {plan.get(key)!r}; use another --work-dir or --replan')
+            if existing.get('sources') != plan.get('sources'):
+                existing['sources'] = plan.get('sources')
+                existing['chunkInputs'] = chunk_inputs(manifest, existing['chunks'])
+                atomic_write_text(self.plan_path, dump_json(existing))
+                self.plan = existing
+                stale = [i for i in range(len(existing['chunks']))
+                         if self.chunk_path(i, '.done').exists() and not self.is_done(i)]
+                print(f'↻ Project files changed since planning: re-bundling, {len(stale)} finished chunk(s) '
+                      'cover changed clips and will be rendered again')
+            plan = existing
+        self.plan = plan
+        return plan
+
+    def plan_outdated(self):
+        """True once another runner re-planned for changed sources (our bundle is old)."""
+        current = _read_json(self.plan_path)
+        return bool(current) and current.get('sources') != self.plan.get('sources')
+
+    def reload_plan(self):
+        self.plan = _read_json(self.plan_path) or self.plan
+        return self.plan
+
+    def bundle_dir(self):
+        """Bundle directory for the plan's current sources fingerprint."""
+        sources = self.plan.get('sources')
+        if not sources:
+            return self.root / 'bundle'
+        key = hashlib.sha1(json.dumps(sources, sort_keys=True).encode()).hexdigest()[:12]
+        return self.root / f'bundle-{key}'
+
+    def remove_old_bundles(self):
+        current = self.bundle_dir()
+        for path in [self.root / 'bundle', *self.root.glob('bundle-*')]:
+            if path != current and path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+
+    def chunk_path(self, index, suffix):
+        return self.chunks_dir / f'{index:04d}{suffix}'
+
+    def is_done(self, index):
+        """Finished, and rendered from the inputs the plan has now."""
+        done = _read_json(self.chunk_path(index, '.done'))
+        if done is None:
+            return False
+        inputs = self.plan.get('chunkInputs')
+        return done.get('inputs') == (inputs[index] if inputs else None)
+
+    def state(self, index):
+        if self.is_done(index):
+            return 'done'
+        if self.chunk_path(index, '.lock').exists():
+            return 'running'
+        if self.chunk_path(index, '.failed').exists():
+            return 'failed'
+        return 'pending'
+
+    def claim(self, index):
+        """Take the chunk's lock; stale or orphaned locks are stolen."""
+        if self.state(index) == 'done':
+            return False
+        return self.take_lock(self.chunk_path(index, '.lock'))
+
+    def take_lock(self, lock):
+        """Create lock, or steal it when stale. Returns True if this process holds it."""
+        owner = json.dumps({'host': HOST, 'pid': os.getpid(), 'started': time.time()})
+        if _create_exclusive(lock, owner):
+            return True
+        seen = _read_text(lock)
+        if seen is None or not self._is_stale(lock):
+            return False
+        # rename is atomic: only one runner moves the lock away
+        stale = lock.with_name(f'{lock.name}.stale-{HOST}-{os.getpid()}')
+        try:
+            os.rename(lock, stale)
+        except OSError:
+            return False
+        if _read_text(stale) != seen:
+            # the stale lock was replaced by a fresh one between our check and the
+            # rename: put that one back (O_EXCL, never over a newer lock) and give up
+            _create_exclusive(lock, _read_text(stale) or '')
+            stale.unlink(missing_ok=True)
+            return False
+        stale.unlink(missing_ok=True)
+        return _create_exclusive(lock, owner)
+
+    def _is_stale(self, lock):
+        """Stale when the heartbeat is older than lock_timeout, or the owner process on this host is gone."""
+        try:
+            age = time.time() - lock.stat().st_mtime
+        except FileNotFoundError:
+            return True
+        if age > self.lock_timeout:
+            return True
+        owner = _read_json(lock) or {}
+        if owner.get('host') == HOST and owner.get('pid') and owner['pid'] != os.getpid():
+            return not _pid_alive(owner['pid'])
+        return False
+
+    def heartbeat(self, index):
+        _touch(self.chunk_path(index, '.lock'))
+
+    def release(self, index):
+        self.chunk_path(index, '.lock').unlink(missing_ok=True)
+
+    def mark_done(self, index, seconds):
+        self.chunk_path(index, '.failed').unlink(missing_ok=True)
+        inputs = self.plan.get('chunkInputs')
+        atomic_write_text(self.chunk_path(index, '.done'), dump_json({
+            'host': HOST, 'seconds': round(seconds, 2), 'finished': time.time(),
+            'inputs': inputs[index] if inputs else None}))
+
+    def mark_failed(self, index, error):
+        failed = _read_json(self.chunk_path(index, '.failed')) or {}
+        atomic_write_text(self.chunk_path(index, '.failed'), dump_json({
+            'host': HOST, 'attempts': failed.get('attempts', 0) + 1, 'error': error, 'failed': time.time()}))
+
+    def summary(self):
+        states = [self.state(i) for i in range(len(self.plan['chunks']))]
+        counts = {s: states.count(s) for s in ('done', 'running', 'failed', 'pending')}
+        return states, counts
+
+    def write_state(self):
+        """Human/tool readable checkpoint; the per-chunk markers stay authoritative."""
+        states, counts = self.summary()
+        chunks = []
+        for index, (start, end) in enumerate(self.plan['chunks']):
+            entry = {'index': index, 'frames': [start, end], 'state': states[index]}
+            done = _read_json(self.chunk_path(index, '.done'))
+            failed = _read_json(self.chunk_path(index, '.failed'))
+            if done:
+                entry.update(seconds=done.get('seconds'), host=done.get('host'))
+            elif failed:
+                entry.update(attempts=failed.get('attempts'), error=failed.get('error'))
+            chunks.append(entry)
+        try:
+            atomic_write_text(self.root / 'state.json', dump_json({**counts, 'updated': time.time(), 'chunks': chunks}))
+        except OSError:
+            pass  # another runner may be replacing it at the same moment
+
+
+# ─── Remotion / ffmpeg steps ─────────────────────────────────────────────────
+
+def _run_with_heartbeat(command, lock):
+    """subprocess.run(check=True) that keeps lock fresh while the command runs."""
+    process = subprocess.Popen(command, cwd=ROOT_DIR)
+    beat = time.monotonic()
+    try:
+        while process.poll() is None:
+            time.sleep(POLL)
+            if time.monotonic() - beat > HEARTBEAT:
+                _touch(lock)
+                beat = time.monotonic()
+    except BaseException:
+        process.kill()
+        raise
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command)
+
+
+def prepare_bundle(job, project_dir, public_dir, minimal_public):
+    """Bundle the Remotion project once per sources fingerprint; other runners wait for it.
+
+    bundle.done names the bundle built for the plan's current sources, so a
+    changed project file or asset gets a fresh bundle. The bundle lock is
+    refreshed while bundling and stolen when stale, like chunk locks.
+    """
+    bundle_dir = job.bundle_dir()
+    done = job.root / 'bundle.done'
+    lock = job.root / 'bundle.lock'
+    is_current = lambda: (_read_json(done) or {}).get('dir') == bundle_dir.name
+    waiting = False
+    while True:
+        if is_current():
+            return bundle_dir
+        if job.take_lock(lock):
+            break
+        if not waiting:
+            print('⏳ Waiting for another runner to finish the bundle...')
+            waiting = True
+        time.sleep(POLL * 5)
+    try:
+        if is_current():
+            return bundle_dir  # finished while we were taking the lock
+        subprocess.run(['node', str(ROOT_DIR / 'scripts' / 'generate-project-list.js')],
+                       cwd=ROOT_DIR, check=True, stdout=subprocess.DEVNULL)
+        command = ['npx', 'remotion', 'bundle', '--out-dir', str(bundle_dir)]
+        if minimal_public:
+            stats = build_bundle(project_dir, job.root / 'public', public_dir)
+            command += ['--public-dir', str(job.root / 'public')]
+            print(f"📦 Minimal public dir: {stats['files']} file(s)")
+        shutil.rmtree(bundle_dir, ignore_errors=True)  # left over by a killed runner
+        print(f'🧱 Bundling into {bundle_dir}')
+        _run_with_heartbeat(command, lock)
+        atomic_write_text(done, dump_json({'dir': bundle_dir.name, 'sources': job.plan.get('sources'),
+                                           'host': HOST, 'finished': time.time()}))
+    finally:
+        lock.unlink(missing_ok=True)
+    return bundle_dir
+
+
+def render_command(plan, bundle_dir, index, output, extra_args):
+    start, end = plan['chunks'][index]
+    props = {'projectId': plan['projectId']}
+    if plan.get('useRenderManifest'):
+        props['useRenderManifest'] = True  # project-loader.ts reads the bundled manifest
+    return ['npx', 'remotion', 'render', str(bundle_dir), plan['composition'], str(output),
+            f'--frames={start}-{end}', f"--concurrency={plan['concurrency']}", f"--codec={plan['codec']}",
+            '--props', json.dumps(props), '--overwrite', *extra_args]
+
+
+def concat_chunks(job, output):
+    """Join the chunk files into output; video is stream-copied."""
+    if not shutil.which('ffmpeg'):
+        print('✗ ffmpeg not found; chunks are kept in', job.chunks_dir)
+        return False
+    plan = job.plan
+    ext = '.mkv' if plan['codec'] == 'h264-mkv' else '.mp4'
+    list_path = job.root / 'concat.txt'
+    lines = [f"file '{job.chunk_path(i, ext).resolve().as_posix()}'" for i in range(len(plan['chunks']))]
+    list_path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    audio = ['-c:a', 'aac', '-b:a', '320k'] if plan['codec'] == 'h264-mkv' else ['-c:a', 'copy']
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_name(f'.{output.stem}.concat{output.suffix}')
+    command = ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-y', '-f', 'concat', '-safe', '0',
+               '-i', str(list_path), '-map', '0:v', '-map', '0:a?', '-c:v', 'copy', *audio,
+               '-movflags', '+faststart', str(tmp)]
+    result = subprocess.run(command)
+    if result.returncode != 0:
+        tmp.unlink(missing_ok=True)
+        print(f'✗ ffmpeg concat failed (exit {result.returncode})')
+        return False
+    os.replace(tmp, output)
+    return True
+
+
+# ─── Scheduler ───────────────────────────────────────────────────────────────
+
+def run_chunks(job, bundle_dir, workers, retries, extra_args, dry_run=False):
+    """Render claimable chunks with up to `workers` processes until none is left.
+
+    Returns the number of chunks this runner rendered successfully.
+    """
+    plan = job.plan
+    ext = '.mkv' if plan['codec'] == 'h264-mkv' else '.mp4'
+    attempts = {}
+    running = {}   # index -> (process, started, log file, last heartbeat)
+    rendered = 0
+
+    def next_chunk():
+        if job.plan_outdated():
+            return None  # re-planned for changed sources: our bundle is outdated
+        for index in range(len(plan['chunks'])):
+            if index in running or attempts.get(index, 0) >= retries:
+                continue
+            if job.claim(index):
+                return index
+        return None
+
+    while True:
+        while len(running) < workers:
+            index = next_chunk()
+            if index is None:
+                break
+            attempts[index] = attempts.get(index, 0) + 1
+            part = job.chunk_path(index, f'.part{ext}')
+            command = render_command(plan, bundle_dir, index, part, extra_args)
+            start, end = plan['chunks'][index]
+            print(f'▶️  chunk {index} frames {start}-{end} (attempt {attempts[index]})')
+            if dry_run:
+                print('   ' + ' '.join(command))
+                job.release(index)
+                attempts[index] = retries
+                continue
+            log = open(job.chunk_path(index, '.log'), 'w', encoding='utf-8')
+            process = subprocess.Popen(command, cwd=ROOT_DIR, stdout=log, stderr=subprocess.STDOUT)
+            running[index] = (process, time.monotonic(), log, time.monotonic())
+
+        if not running:
+            return rendered
+
+        time.sleep(POLL)
+        for index, (process, started, log, beat) in list(running.items()):
+            now = time.monotonic()
+            if process.poll() is None:
+                if now - beat > HEARTBEAT:
+                    job.heartbeat(index)
+                    running[index] = (process, started, log, now)
+                continue
+            log.close()
+            del running[index]
+            seconds = now - started
+            part = job.chunk_path(index, f'.part{ext}')
+            if process.returncode == 0 and part.exists():
+                os.replace(part, job.chunk_path(index, ext))
+                job.mark_done(index, seconds)
+                rendered += 1
+                print(f'✅ chunk {index} done in {seconds:.1f}s')
+            else:
+                part.unlink(missing_ok=True)
+                job.mark_failed(index, f'remotion exited with {process.returncode}, see {log.name}')
+                print(f'✗ chunk {index} failed (exit {process.returncode}), log: {log.name}')
+            job.release(index)
+            job.write_state()
+
+
+def print_status(job):
+    states, counts = job.summary()
+    frames = job.plan['frames']
+    done_frames = sum(end - start + 1 for (start, end), s in zip(job.plan['chunks'], states) if s == 'done')
+    print(f"📊 {job.plan['projectId']} {job.plan['composition']}: {counts['done']}/{len(states)} chunks done "
+          f"({done_frames}/{frames} frames), {counts['running']} running, {counts['failed']} failed, "
+          f"{counts['pending']} pending")
+    for index, state in enumerate(states):
+        if state == 'failed':
+            failed = _read_json(job.chunk_path(index, '.failed')) or {}
+            print(f"  ✗ chunk {index}: {failed.get('error')} ({failed.get('attempts')} attempt(s))")
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    extra_args = []
+    if '--' in argv:
+        extra_args = argv[argv.index('--') + 1:]
+        argv = argv[:argv.index('--')]
+
+    parser = argparse.ArgumentParser(description='Chunked, resumable Remotion render.')
+    parser.add_argument('project', help='project id')
+    parser.add_argument('--composition', default=COMPOSITIONS[0], choices=COMPOSITIONS)
+    parser.add_argument('--projects-dir', default=str(PROJECTS_DIR))
+    parser.add_argument('--frames', type=int, help='durationInFrames (default: from render-manifest.json)')
+    parser.add_argument('--chunk-size', type=int, help='frames per chunk (default: ~3 chunks per worker, min 60)')
+    parser.add_argument('--workers', type=int, help='render processes on this machine (default: by RAM)')
+    parser.add_argument('--concurrency', type=int, default=1, help='Chromium tabs per render process')
+    parser.add_argument('--codec', default='h264-mkv', choices=('h264-mkv', 'h264'),
+                        help='chunk codec; h264-mkv keeps PCM audio for gapless joins')
+    parser.add_argument('--retries', type=int, default=2, help='attempts per chunk in this run')
+    parser.add_argument('--lock-timeout', type=int, default=LOCK_TIMEOUT, help='seconds before a lock is stale')
+    parser.add_argument('--work-dir', help=f'shared work dir (default: {DEFAULT_WORK_DIR}/<project>-<composition>)')
+    parser.add_argument('--output', help='final video (default: out/<project>-<composition>.mp4)')
+    parser.add_argument('--full-public', action='store_true', help='bundle the whole public/ dir')
+    parser.add_argument('--replan', action='store_true', help='discard plan and chunks in the work dir')
+    parser.add_argument('--status', action='store_true', help='show progress and exit')
+    parser.add_argument('--dry-run', action='store_true', help='print the chunk commands only')
+    args = parser.parse_args(argv)
+
+    project_dir = Path(args.projects_dir) / args.project
+    if not project_dir.is_dir():
+        print(f'✗ Project not found: {project_dir}')
+        return 1
+    name = f'{args.project}-{args.composition}'
+    job = RenderJob(args.work_dir or DEFAULT_WORK_DIR / name, args.lock_timeout)
+    output = Path(args.output or ROOT_DIR / 'out' / f'{name}.mp4')
+
+    if args.status:
+        job.plan = _read_json(job.plan_path)
+        if not job.plan:
+            print(f'No plan in {job.root}')
+            return 1
+        print_status(job)
+        return 0
+
+    if args.replan and job.root.exists():
+        shutil.rmtree(job.root)
+
+    # Refreshed here (rebuilt only if stale) so the bundle carries a current manifest
+    manifest = load_manifest(project_dir)
+    frames = args.frames
+    if frames is None:
+        if not manifest:
+            print('✗ No render manifest (needs script.json or .otio); pass --frames')
+            return 1
+        frames = manifest['durationInFrames']
+    workers = args.workers or workers_by_ram(args.concurrency)
+    chunk_size = args.chunk_size or max(60, math.ceil(frames / (workers * 3)))
+    try:
+        job.load_or_create_plan({
+            'version': PLAN_VERSION, 'projectId': args.project, 'composition': args.composition,
+            'frames': frames, 'chunkSize': chunk_size, 'concurrency': args.concurrency, 'codec': args.codec,
+            'chunks': split_frames(frames, chunk_size), 'created': time.time(), 'host': HOST,
+            'useRenderManifest': manifest is not None, 'sources': (manifest or {}).get('sources'),
+        }, manifest)
+    except ValueError as e:
+        print(f'✗ {e}')
+        return 1
+    plan = job.plan
+    print(f"🎬 {name}: {plan['frames']} frames in {len(plan['chunks'])} chunk(s) of {plan['chunkSize']}, "
+          f'{workers} worker(s) on {HOST} ({total_ram() // GB}GB RAM)')
+
+    started = time.monotonic()
+    if args.dry_run:
+        bundle_dir = job.bundle_dir()
+    else:
+        try:
+            bundle_dir = prepare_bundle(job, project_dir, Path(args.projects_dir).parent, not args.full_public)
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f'✗ Bundling failed: {e}')
+            return 1
+    rendered = run_chunks(job, bundle_dir, workers, args.retries, extra_args, args.dry_run)
+    if args.dry_run:
+        return 0
+    outdated = job.plan_outdated()
+    job.reload_plan()  # judge "done" by the latest plan if another runner re-planned
+    job.write_state()
+
+    states, counts = job.summary()
+    if counts['done'] < len(states):
+        print_status(job)
+        if counts['running']:
+            print('⏳ Other runners are still rendering; the last one to finish concatenates.')
+            return 0
+        if outdated:
+            print('↻ Project files changed during the render: run the same command again to re-bundle.')
+        else:
+            print('↻ Run the same command again to retry the failed chunks.')
+        return 1
+
+    if not _create_exclusive(job.root / 'concat.lock', HOST):
+        print('⏳ Another runner is concatenating')
+        return 0
+    try:
+        if not concat_chunks(job, output):
+            return 1
+    finally:
+        (job.root / 'concat.lock').unlink(missing_ok=True)
+    job.remove_old_bundles()
+    print(f'🎉 {output} ({rendered} chunk(s) rendered here, {time.monotonic() - started:.1f}s)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
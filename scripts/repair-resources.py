@@ -1,63 +1,217 @@
-import json
+#!/usr/bin/env python3
+"""
+Check and repair resources.json for every project under public/projects.
+
+Rules (generic, no per-project scene ids):
+  1. pinnedResources entries without a `results` list get their pinned
+     file wrapped into one, so loaders can treat them like other groups.
+  2. In videos/images groups, if the first result has no usable media
+     (no localPath and no downloadUrls), the first valid result is
+     promoted to the front.
+  3. A localPath whose file is missing is relinked from the shared media
+     cache (media_cache.py) when one of the result's URLs is stored there.
+
+Projects are processed in parallel. Each resources.json is streamed (see
+json_stream.py) and repairs are applied as targeted byte-span edits, so
+memory and patch cost do not grow with the number of candidates. A file is
+only touched when a rule actually changed it, so unchanged projects keep
+their mtime and generate-project-list.js ordering stays stable.
+
+Usage:
+  python3 scripts/repair-resources.py                 # all projects
+  python3 scripts/repair-resources.py my-project      # selected projects
+  python3 scripts/repair-resources.py --check         # report only, exit 1 if repairs needed
+  python3 scripts/repair-resources.py --no-cache      # skip relinking from the media cache
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-def repair_resources(project_dir):
-    res_path = Path(project_dir) / 'resources.json'
-    if not res_path.exists():
-        print(f"File not found: {res_path}")
-        return
-
-    with open(res_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    resources = data.get('resources', {})
-    
-    # 1. Fix pinnedResources structure for scene-3
-    pinned = resources.get('pinnedResources', [])
-    new_pinned = []
-    for p in pinned:
-        if p.get('sceneId') == 'scene-3' and 'results' not in p:
-            # Wrap the result info into a 'results' list
-            result_info = {
-                'id': 'pinned-scene-3',
-                'localPath': p.get('localPath'),
-                'type': 'pinned',
-                'description': p.get('description')
-            }
-            p['results'] = [result_info]
-        new_pinned.append(p)
-    resources['pinnedResources'] = new_pinned
-
-    # 2. For scene-1, scene-4, scene-9, if the first result is invalid (no downloadUrl/localPath),
-    # swap it with a valid one from same scene
-    for group_name in ['videos', 'images']:
-        groups = resources.get(group_name, [])
-        for group in groups:
-            scene_id = group.get('sceneId')
-            results = group.get('results', [])
-            if not results:
+from json_stream import apply_edits, insert_members, iter_values, read_span
+from media_cache import DEFAULT_CACHE_DIR, MediaCache
+from project_files import PROJECTS_DIR, iter_projects, resolve_local_path, resource_urls
+
+MEDIA_GROUPS = ('videos', 'images')
+
+
+def is_valid_result(result):
+    if not isinstance(result, dict):
+        return False
+    if result.get('localPath'):
+        return True
+    urls = result.get('downloadUrls')
+    return isinstance(urls, dict) and any(urls.values())
+
+
+def wrap_pinned(entry):
+    """Return the `results` list for a pinned entry that lacks one, or None."""
+    if not isinstance(entry, dict) or 'results' in entry:
+        return None
+    scene_id = entry.get('sceneId')
+    if not scene_id:
+        return None
+    return [{
+        'id': f'pinned-{scene_id}',
+        'localPath': entry.get('localPath'),
+        'type': 'pinned',
+        'description': entry.get('description'),
+    }]
+
+
+def _missing_local(project_dir, result):
+    """(dest, urls) when a result's localPath file is gone but it has URLs."""
+    if not isinstance(result, dict) or not isinstance(result.get('localPath'), str) \
+            or not result['localPath']:
+        return None
+    dest = resolve_local_path(project_dir, result['localPath'])
+    if dest.exists():
+        return None
+    urls = resource_urls(result)
+    return (dest, urls) if urls else None
+
+
+def plan_repairs(res_path):
+    """Stream resources.json and compute the edits the rules require.
+
+    Only one pinned entry or one result is materialized at a time, so memory
+    stays bounded no matter how many candidates a scene carries. Returns
+    (edits, missing, changes) where edits are byte-span splices for
+    apply_edits, missing lists (dest, urls) of local files to restore and
+    changes are human-readable descriptions.
+    """
+    project_dir = Path(res_path).parent
+    patterns = [('resources', 'pinnedResources', '*')]
+    for group_name in MEDIA_GROUPS:
+        patterns.append(('resources', group_name, '*', 'sceneId'))
+        patterns.append(('resources', group_name, '*', 'results', '*'))
+
+    edits = []
+    missing = []
+    changes = []
+    scene_ids = {}
+    # group path -> [span of rank 1, span of first valid result, rank 1 valid?]
+    groups = {}
+    for m in iter_values(res_path, *patterns):
+        if m.path[1] == 'pinnedResources' or m.path[3] == 'results':
+            lost = _missing_local(project_dir, m.value)
+            if lost:
+                missing.append(lost)
+        if m.path[1] == 'pinnedResources':
+            wrapped = wrap_pinned(m.value)
+            if wrapped is not None:
+                raw = read_span(res_path, m.start, m.end)
+                edits.append(insert_members(raw, m.start, {'results': wrapped}))
+                changes.append(f"pinned {m.value['sceneId']}: wrapped into results")
+        elif m.path[3] == 'sceneId':
+            scene_ids[m.path[:3]] = m.value
+        else:
+            key, rank = m.path[:3], m.path[4]
+            if rank == 0:
+                groups[key] = [(m.start, m.end, 0), None, is_valid_result(m.value)]
+            elif key in groups and groups[key][1] is None and not groups[key][2] \
+                    and is_valid_result(m.value):
+                groups[key][1] = (m.start, m.end, rank)
+
+    for key, (first, backup, first_valid) in groups.items():
+        if first_valid or backup is None:
+            continue
+        first_raw = read_span(res_path, first[0], first[1])
+        backup_raw = read_span(res_path, backup[0], backup[1])
+        edits.append((first[0], first[1], backup_raw))
+        edits.append((backup[0], backup[1], first_raw))
+        changes.append(f"{key[1]} {scene_ids.get(key)}: promoted rank {backup[2] + 1} to rank 1")
+
+    return edits, missing, changes
+
+
+def relink_missing(project_dir, missing, cache_dir, dry_run=False):
+    """Restore missing local files from the media cache. Returns change descriptions."""
+    # --check must not touch the shared store (LRU times, corrupt-object cleanup)
+    cache = MediaCache.open_existing(cache_dir, read_only=dry_run) if missing and cache_dir else None
+    if cache is None:
+        return []
+    changes = []
+    try:
+        for dest, urls in missing:
+            rel = os.path.relpath(dest, project_dir)
+            if dry_run:
+                if any(cache.contains(url) for url in urls):
+                    changes.append(f'{rel}: missing, available in media cache')
                 continue
-            
-            # Check if first result is valid
-            first = results[0]
-            is_valid = first.get('localPath') or (first.get('downloadUrls') and any(first['downloadUrls'].values()))
-            
-            if not is_valid:
-                print(f"Scene {scene_id} first result is invalid. Searching for backup...")
-                for i in range(1, len(results)):
-                    backup = results[i]
-                    if backup.get('localPath') or (backup.get('downloadUrls') and any(backup['downloadUrls'].values())):
-                        print(f"Found valid backup for {scene_id} at rank {i+1}")
-                        # Swap
-                        results[0], results[i] = results[i], results[0]
-                        break
-
-    # 3. Ensure music is correctly identified
-    # The music track in resources.json was scraped, it has localPath.
-    
-    with open(res_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    print("Repaired resources.json")
-
-if __name__ == "__main__":
-    repair_resources('public/projects/noi-long-con-xa-que')
+            kind = cache.resolve(urls, dest)
+            if kind:
+                changes.append(f'{rel}: restored from media cache ({kind})')
+    finally:
+        cache.close()
+    return changes
+
+
+def repair_project(project_dir, dry_run=False, cache_dir=None):
+    """Repair one project. Returns (project_id, changes, error)."""
+    project_dir = Path(project_dir)
+    res_path = project_dir / 'resources.json'
+    try:
+        edits, missing, changes = plan_repairs(res_path)
+        if edits and not dry_run:
+            apply_edits(res_path, edits)
+        changes += relink_missing(project_dir, missing, cache_dir, dry_run)
+        return project_dir.name, changes, None
+    except (OSError, ValueError) as e:
+        return project_dir.name, [], str(e)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check and repair resources.json across projects.')
+    parser.add_argument('projects', nargs='*', help='project ids (default: all)')
+    parser.add_argument('--projects-dir', default=str(PROJECTS_DIR))
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='worker processes (default: CPU count)')
+    parser.add_argument('--check', action='store_true',
+                        help='do not write; exit 1 if any project needs repair')
+    parser.add_argument('--cache-dir', default=str(DEFAULT_CACHE_DIR),
+                        help='media cache used to restore missing local files')
+    parser.add_argument('--no-cache', action='store_true', help='do not restore from the media cache')
+    args = parser.parse_args(argv)
+
+    started = time.monotonic()
+    targets = [p for p in iter_projects(args.projects_dir, args.projects)
+               if (p / 'resources.json').is_file()]
+    if not targets:
+        print('No projects with resources.json found')
+        return 1 if args.projects else 0
+
+    cache_dir = None if args.no_cache else args.cache_dir
+    jobs = max(1, min(args.jobs, len(targets)))
+    if jobs == 1:
+        outcomes = [repair_project(p, args.check, cache_dir) for p in targets]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            chunksize = max(1, len(targets) // (jobs * 4))
+            outcomes = list(pool.map(repair_project, targets, [args.check] * len(targets),
+                                     [cache_dir] * len(targets), chunksize=chunksize))
+
+    repaired = failed = 0
+    for project_id, changes, error in outcomes:
+        if error:
+            failed += 1
+            print(f'✗ {project_id}: {error}')
+        elif changes:
+            repaired += 1
+            print(f"{'!' if args.check else '✓'} {project_id}")
+            for change in changes:
+                print(f'    {change}')
+
+    verb = 'need repair' if args.check else 'repaired'
+    print(f'{len(targets)} project(s) checked, {repaired} {verb}, {failed} failed '
+          f'in {time.monotonic() - started:.2f}s ({jobs} worker(s))')
+    if failed or (args.check and repaired):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Downscale oversized project images before rendering (cross-platform).
+
+Stock photos of 8192×5464 decode to 130MB+ in headless Chromium and stall
+delayRender (docs/render-optimization.md §2.1). This stage:
+
+  - reads dimensions from image headers only (image_info.py)
+  - downscales JPEG/PNG/WebP larger than --max-dimension in a process pool;
+    JPEGs use Pillow's draft mode so the decoder works at a reduced DCT scale
+  - remembers every inspected file in <project>/.image-index.json keyed by
+    path, size and mtime, so unchanged images are never opened again
+
+Resized files are written to a temp file and renamed over the original, which
+also detaches them from any media-cache hardlink instead of editing the
+shared copy.
+
+Needs Pillow (scripts/requirements.txt, installed into scripts/venv by
+`npm run setup:all`); without it, macOS falls back to `sips` and other
+platforms to ImageMagick. With no backend at all the oversized images are
+reported and the stage exits non-zero.
+
+Usage:
+  python3 scripts/resize_images.py [project-id ...]
+  python3 scripts/resize_images.py --max-dimension 2560 --check
+"""
+
+import argparse
+import json
+import os
+import math
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from image_info import IMAGE_EXTENSIONS, image_size
+from project_files import PROJECTS_DIR, atomic_write_text, dump_json, iter_projects
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional dependency
+    Image = None
+
+MAX_IMAGE_DIMENSION = 1920  # keep in sync with pre-render-download.js
+INDEX_FILE = '.image-index.json'
+IMAGE_DIRS = ('images', 'imports/images', 'videos', 'imports', 'uploads', '.')
+RESIZABLE_FORMATS = ('jpeg', 'png', 'webp')
+
+
+def resize_backend():
+    if Image is not None:
+        return 'pillow'
+    if platform.system() == 'Darwin':
+        return 'sips'
+    for tool in ('magick', 'convert'):  # ImageMagick 7 / 6
+        if shutil.which(tool):
+            return tool
+    return None
+
+
+def fit_within(width, height, max_dim):
+    """Aspect-correct size of width×height scaled to fit a max_dim box."""
+    scale = max_dim / max(width, height)
+    return max(1, math.ceil(width * scale)), max(1, math.ceil(height * scale))
+
+
+def iter_images(project_dir):
+    """Yield (relative path, os.stat_result) for images in the scanned folders."""
+    for sub in IMAGE_DIRS:
+        base = project_dir / sub
+        if not base.is_dir():
+            continue
+        for entry in os.scandir(base):
+            if entry.name.startswith('.') or not entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            if entry.is_file():
+                yield os.path.relpath(entry.path, project_dir), entry.stat()
+
+
+def load_index(project_dir):
+    try:
+        with open(project_dir / INDEX_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def downscale(path, max_dim, backend):
+    """Downscale one image in place (atomic rename). Returns (width, height)."""
+    path = Path(path)
+    tmp = path.with_name(f'.{path.name}.resize.tmp')
+    try:
+        if backend == 'sips':
+            subprocess.run(['sips', '--resampleHeightWidthMax', str(max_dim), str(path), '--out', str(tmp)],
+                           check=True, capture_output=True, timeout=60)
+        elif backend in ('magick', 'convert'):
+            # jpeg:size lets libjpeg shrink on load, like Pillow's draft mode below
+            subprocess.run([backend, '-define', f'jpeg:size={max_dim}x{max_dim}', str(path), '-auto-orient',
+                            '-resize', f'{max_dim}x{max_dim}>', '-quality', '90',
+                            f'{path.suffix[1:].lower()}:{tmp}'],
+                           check=True, capture_output=True, timeout=120)
+        else:
+            with Image.open(path) as img:
+                fmt = img.format
+                icc_profile = img.info.get('icc_profile')
+                if fmt == 'JPEG':
+                    # Let libjpeg decode at 1/2, 1/4 or 1/8 scale: far less memory and time.
+                    # The requested size must be the real target, not the square box, or
+                    # non-square photos decode at a smaller reduction than they could.
+                    img.draft('RGB', fit_within(img.width, img.height, max_dim))
+                img = ImageOps.exif_transpose(img)
+                img.thumbnail((max_dim, max_dim), Image.LANCZOS)
+                options = {'quality': 90, 'optimize': True} if fmt in ('JPEG', 'WEBP') else {'optimize': True}
+                if icc_profile:
+                    options['icc_profile'] = icc_profile  # keep colours as authored
+                if fmt == 'JPEG' and img.mode not in ('RGB', 'L'):
+                    img = img.convert('RGB')
+                img.save(tmp, format=fmt, **options)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    size = image_size(path)
+    return (size[0], size[1]) if size else (0, 0)
+
+
+def _downscale_job(job):
+    path, max_dim, backend = job
+    try:
+        return path, downscale(path, max_dim, backend), None
+    except Exception as e:  # reported per file, the batch continues
+        return path, None, str(e)
+
+
+def scan_project(project_dir, max_dim):
+    """Inspect a project's images using its index.
+
+    Returns (index, oversized, inspected, changed): oversized lists relative
+    paths to downscale, inspected counts headers actually read and changed
+    tells whether the index needs saving.
+    """
+    old_index = load_index(project_dir)
+    index = {}
+    oversized = []
+    inspected = 0
+    for rel, st in iter_images(project_dir):
+        entry = old_index.get(rel)
+        if not entry or entry.get('size') != st.st_size or entry.get('mtime_ns') != st.st_mtime_ns:
+            info = image_size(project_dir / rel)
+            inspected += 1
+            entry = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns,
+                     'width': info[0] if info else None, 'height': info[1] if info else None,
+                     'format': info[2] if info else None}
+        index[rel] = entry
+        if entry.get('format') in RESIZABLE_FORMATS and max(entry['width'], entry['height']) > max_dim:
+            oversized.append(rel)
+    return index, oversized, inspected, index != old_index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Downscale oversized project images.')
+    parser.add_argument('projects', nargs='*', help='project ids (default: all)')
+    parser.add_argument('--projects-dir', default=str(PROJECTS_DIR))
+    parser.add_argument('--max-dimension', type=int, default=MAX_IMAGE_DIMENSION)
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--check', action='store_true', help='only report oversized images')
+    args = parser.parse_args(argv)
+
+    started = time.monotonic()
+    backend = resize_backend()
+    if backend is None and not args.check:
+        print('⚠️  No image backend: install Pillow (npm run setup:all, or pip install -r scripts/requirements.txt) '
+              'or ImageMagick; reporting oversized images only')
+
+    projects = []
+    total_images = total_inspected = 0
+    for project_dir in iter_projects(args.projects_dir, args.projects):
+        index, oversized, inspected, changed = scan_project(project_dir, args.max_dimension)
+        total_images += len(index)
+        total_inspected += inspected
+        projects.append((project_dir, index, oversized, changed))
+
+    jobs = [(str(p / rel), args.max_dimension, backend)
+            for p, _, oversized, _ in projects for rel in oversized]
+    results = {}
+    if jobs and backend and not args.check:
+        workers = max(1, min(args.jobs, len(jobs)))
+        if workers == 1:
+            results = {r[0]: r for r in map(_downscale_job, jobs)}
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = {r[0]: r for r in pool.map(_downscale_job, jobs)}
+
+    resized = failed = 0
+    for project_dir, index, oversized, changed in projects:
+        for rel in oversized:
+            entry = index[rel]
+            original = f"{entry['width']}×{entry['height']}"
+            result = results.get(str(project_dir / rel))
+            if result is None:
+                print(f'  🔲 {project_dir.name}/{rel}: {original} exceeds {args.max_dimension}px')
+                continue
+            _, dims, error = result
+            if error:
+                failed += 1
+                print(f'  ✗ {project_dir.name}/{rel}: {error}')
+                continue
+            resized += 1
+            st = (project_dir / rel).stat()
+            index[rel] = {**entry, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns,
+                          'width': dims[0], 'height': dims[1]}
+            changed = True
+            print(f'  🔲 Resized {project_dir.name}/{rel}: {original} → {dims[0]}×{dims[1]}')
+        if changed and not args.check:
+            atomic_write_text(project_dir / INDEX_FILE, dump_json(index))
+
+    oversized_total = sum(len(o) for _, _, o, _ in projects)
+    print(f'🖼️  {total_images} image(s) in {len(projects)} project(s), {total_inspected} inspected, '
+          f'{oversized_total} oversized, {resized} resized, {failed} failed '
+          f'in {time.monotonic() - started:.2f}s')
+    # oversized images left behind (report-only run or no backend) fail the stage
+    return 1 if failed or (oversized_total and (args.check or backend is None)) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
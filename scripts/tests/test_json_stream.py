@@ -0,0 +1,134 @@
+"""Tests for the streaming JSON reader and byte-span patcher (scripts/json_stream.py)."""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from json_stream import apply_edits, encode_value, insert_members, iter_values, read_span  # noqa: E402
+
+DOC = {
+    'ints': [0, -12, 3456789, 10 ** 20],
+    'floats': [1.5, -0.25, 6.02e23, 1e-7],
+    'literals': [True, False, None],
+    'text': 'plain',
+    'escaped': 'quote " backslash \\ tab \t newline \n slash /',
+    'unicode': 'café 日本語 😀',
+    'escaped_unicode': 'é😀',
+    'nested': {'a': [{'b': 'c'}, []], 'empty': {}},
+}
+
+
+def matches(data, *patterns, chunk_size=4096):
+    return list(iter_values(io.BytesIO(data), *patterns, chunk_size=chunk_size))
+
+
+class TokenizerTest(unittest.TestCase):
+    def test_every_chunk_size_gives_the_same_values_and_spans(self):
+        for text in (json.dumps(DOC), json.dumps(DOC, indent=2, ensure_ascii=False),
+                     json.dumps(DOC, ensure_ascii=True)):
+            data = text.encode('utf-8')
+            expected = matches(data, ('*',), chunk_size=len(data))
+            for chunk_size in range(1, 12):
+                with self.subTest(chunk_size=chunk_size, text=text[:20]):
+                    self.assertEqual(matches(data, ('*',), chunk_size=chunk_size), expected)
+            for m in expected:
+                self.assertEqual(m.value, DOC[m.path[0]])
+                self.assertEqual(json.loads(data[m.start:m.end]), m.value)
+
+    def test_number_straddling_a_chunk_boundary(self):
+        data = b'{"n": 123456789012, "f": -1.25e+10}'
+        for chunk_size in range(1, len(data)):
+            values = [m.value for m in matches(data, ('*',), chunk_size=chunk_size)]
+            self.assertEqual(values, [123456789012, -1.25e10])
+
+    def test_escaped_and_multibyte_strings_keep_byte_spans(self):
+        raw = '{"k\\"ey": "a\\"b", "ü": "日本", "e": "\\u00e9\\\\"}'.encode('utf-8')
+        found = {m.path[0]: m for m in matches(raw, ('*',), chunk_size=3)}
+        self.assertEqual(found['k"ey'].value, 'a"b')
+        self.assertEqual(found['ü'].value, '日本')
+        self.assertEqual(found['e'].value, 'é\\')
+        for m in found.values():
+            self.assertEqual(json.loads(raw[m.start:m.end]), m.value)
+
+    def test_patterns_and_nested_matches(self):
+        data = json.dumps({'a': [{'x': 1}, {'x': 2}], 'b': {'x': 3}}).encode()
+        self.assertEqual([m.value for m in matches(data, ('a', '*', 'x'))], [1, 2])
+        self.assertEqual([m.value for m in matches(data, ('**', 'x'))], [1, 2, 3])
+        self.assertEqual([m.path for m in matches(data, ('a',), ('a', 0))], [('a',)])
+
+    def test_invalid_documents(self):
+        for data in (b'', b'{"a": 1', b'{"a": tru}', b'{"a": "x}', b'{"a": 1} 2', b'{"a": 01x}'):
+            with self.subTest(data=data), self.assertRaises(ValueError):
+                matches(data, ('**',), chunk_size=2)
+
+
+class PatchTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / 'doc.json'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, text):
+        self.path.write_bytes(text.encode('utf-8'))
+
+    def insert(self, text, members):
+        self.write(text)
+        m = next(iter_values(self.path, ()))
+        apply_edits(self.path, [insert_members(read_span(self.path, m.start, m.end), m.start, members)])
+        return self.path.read_text(encoding='utf-8')
+
+    def test_insert_members_compact(self):
+        out = self.insert('{"a": 1}', {'b': '日本', 'c': [1, 2]})
+        self.assertEqual(out, '{"a": 1, "b": "日本", "c": [1, 2]}')
+
+    def test_insert_members_pretty(self):
+        out = self.insert('{\n  "a": 1\n}', {'b': {'c': None}})
+        self.assertEqual(out, '{\n  "a": 1,\n  "b": {\n    "c": null\n  }\n}')
+        self.assertEqual(json.loads(out), {'a': 1, 'b': {'c': None}})
+
+    def test_insert_members_empty_objects(self):
+        self.assertEqual(json.loads(self.insert('{}', {'a': 1})), {'a': 1})
+        self.assertEqual(json.loads(self.insert('{\n}', {'a': 1, 'b': 2})), {'a': 1, 'b': 2})
+
+    def test_insert_into_nested_object_keeps_the_rest(self):
+        text = '{\n  "list": [\n    {\n      "id": "r1"\n    },\n    {"id": "r2"}\n  ],\n  "tail": "é"\n}'
+        self.write(text)
+        edits = []
+        for m in iter_values(self.path, ('list', '*')):
+            edits.append(insert_members(read_span(self.path, m.start, m.end), m.start, {'n': m.path[1]}))
+        apply_edits(self.path, edits)
+        out = self.path.read_text(encoding='utf-8')
+        self.assertEqual(json.loads(out), {'list': [{'id': 'r1', 'n': 0}, {'id': 'r2', 'n': 1}], 'tail': 'é'})
+        self.assertIn('      "id": "r1",\n      "n": 0\n    }', out)
+
+    def test_replacements_and_atomic_rename(self):
+        self.write('{"a": "xy", "b": "ü", "c": 1}')
+        inode = os.stat(self.path).st_ino
+        spans = {m.path[0]: m for m in iter_values(self.path, ('*',))}
+        count = apply_edits(self.path, [(spans['a'].start, spans['a'].end, encode_value('zw')),
+                                        (spans['b'].start, spans['b'].end, encode_value('longer ü'))],
+                            chunk_size=2)
+        self.assertEqual(count, 2)
+        self.assertEqual(self.path.read_text(encoding='utf-8'), '{"a": "zw", "b": "longer ü", "c": 1}')
+        # same-length edits too go through a temp file + rename
+        self.assertNotEqual(os.stat(self.path).st_ino, inode)
+        self.assertEqual(os.listdir(self.tmp.name), ['doc.json'])
+
+    def test_overlapping_edits_are_rejected(self):
+        self.write('{"a": "xy"}')
+        with self.assertRaises(ValueError):
+            apply_edits(self.path, [(6, 10, b'"1"'), (8, 9, b'2')])
+        self.assertEqual(self.path.read_text(), '{"a": "xy"}')
+        self.assertEqual(apply_edits(self.path, []), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
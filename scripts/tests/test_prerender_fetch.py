@@ -0,0 +1,251 @@
+"""Tests for the pre-render fetch stage (scripts/prerender_fetch.py) against a local HTTP stand-in."""
+
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from media_cache import MediaCache  # noqa: E402
+from prerender_fetch import Fetcher, HttpClient, PermanentError, TransientError, process_project  # noqa: E402
+
+DATA = bytes(range(256)) * 400  # 100KB
+ETAG = '"v1"'
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """CDN-like server: Range + If-Range, keep-alive, and a few failure modes per path."""
+
+    protocol_version = 'HTTP/1.1'
+    requests = []
+    fail_counts = {}
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        type(self).requests.append((self.path, self.headers.get('Range'), self.headers.get('If-Range')))
+        path = self.path.split('?')[0]
+        if path.startswith('/redirect/'):
+            return self._send(302, headers={'Location': '/' + path.split('/', 2)[2]})
+        if path.endswith('/missing.mp4'):
+            return self._send(404, b'not found')
+        if path.endswith('/flaky.mp4') and self._fail_once_more(path, 2):
+            return self._send(503, b'busy')
+        if path.endswith('/drop.mp4') and self._fail_once_more(path, 1):
+            # promise the whole body, send half, hang up
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(DATA)))
+            self.send_header('ETag', ETAG)
+            self.end_headers()
+            self.wfile.write(DATA[:len(DATA) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        self._send_data()
+
+    def _fail_once_more(self, path, times):
+        counts = type(self).fail_counts
+        counts[path] = counts.get(path, 0) + 1
+        return counts[path] <= times
+
+    def _send(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_data(self):
+        ranged = self.headers.get('Range')
+        if ranged and self.headers.get('If-Range') not in (None, ETAG):
+            ranged = None  # representation changed: full body
+        if ranged:
+            start = int(ranged.split('=')[1].split('-')[0])
+            return self._send(206, DATA[start:], {
+                'Content-Range': f'bytes {start}-{len(DATA) - 1}/{len(DATA)}', 'ETag': ETAG})
+        self._send(200, DATA, {'ETag': ETAG})
+
+
+class FetchTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StandIn)
+        cls.base = f'http://127.0.0.1:{cls.server.server_address[1]}'
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StandIn.requests = []
+        StandIn.fail_counts = {}
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def fetch(self, path, state=None, retries=3):
+        state = {} if state is None else state
+
+        async def go():
+            client = HttpClient(per_host=2, timeout=5)
+            fetcher = Fetcher(client, retries=retries, backoff=0)
+            try:
+                outcome = await fetcher.fetch(self.base + path, self.dir / 'out.mp4', state)
+            finally:
+                client.close()
+            return outcome, sum(pool.opened for pool in client.pools.values())
+
+        return (*asyncio.run(go()), state)
+
+    def test_plain_download_then_cached(self):
+        outcome, _, state = self.fetch('/a.mp4')
+        self.assertEqual(outcome, 'downloaded')
+        self.assertEqual((self.dir / 'out.mp4').read_bytes(), DATA)
+        self.assertEqual(state, {'url': self.base + '/a.mp4', 'etag': ETAG, 'length': len(DATA), 'complete': True})
+        outcome, _, _ = self.fetch('/a.mp4', state)
+        self.assertEqual(outcome, 'cached')
+
+    def test_range_resume_after_dropped_body(self):
+        outcome, _, _ = self.fetch('/drop.mp4')
+        self.assertEqual(outcome, 'downloaded')
+        self.assertEqual((self.dir / 'out.mp4').read_bytes(), DATA)
+        self.assertFalse((self.dir / 'out.mp4.tmp').exists())
+        first, second = StandIn.requests
+        self.assertIsNone(first[1])
+        self.assertEqual(second[1:], (f'bytes={len(DATA) // 2}-', ETAG))
+
+    def test_if_range_mismatch_restarts_from_zero(self):
+        (self.dir / 'out.mp4.tmp').write_bytes(b'stale partial from an older version')
+        state = {'url': self.base + '/a.mp4', 'etag': '"old"', 'length': len(DATA), 'complete': False}
+        outcome, _, state = self.fetch('/a.mp4', state)
+        self.assertEqual(outcome, 'downloaded')
+        self.assertEqual(StandIn.requests[0][1:], ('bytes=35-', '"old"'))
+        self.assertEqual((self.dir / 'out.mp4').read_bytes(), DATA)
+        self.assertEqual(state['etag'], ETAG)
+
+    def test_redirect_reuses_the_keep_alive_connection(self):
+        outcome, connections, state = self.fetch('/redirect/a.mp4')
+        self.assertEqual(outcome, 'downloaded')
+        self.assertEqual([r[0] for r in StandIn.requests], ['/redirect/a.mp4', '/a.mp4'])
+        self.assertEqual(connections, 1)
+        self.assertEqual(state['url'], self.base + '/redirect/a.mp4')
+
+    def test_4xx_fails_fast_and_removes_tmp(self):
+        (self.dir / 'out.mp4.tmp').write_bytes(b'partial')
+        state = {'url': self.base + '/missing.mp4', 'etag': ETAG}
+        with self.assertRaises(PermanentError):
+            self.fetch('/missing.mp4', state)
+        self.assertEqual(len(StandIn.requests), 1)
+        self.assertFalse((self.dir / 'out.mp4.tmp').exists())
+        self.assertFalse((self.dir / 'out.mp4').exists())
+        self.assertEqual(state, {})
+
+    def test_5xx_is_retried(self):
+        outcome, _, _ = self.fetch('/flaky.mp4')
+        self.assertEqual(outcome, 'downloaded')
+        self.assertEqual(len(StandIn.requests), 3)
+        self.assertEqual((self.dir / 'out.mp4').read_bytes(), DATA)
+
+    def test_5xx_gives_up_after_retries(self):
+        with self.assertRaises(TransientError):
+            self.fetch('/flaky.mp4', retries=1)
+        self.assertEqual(len(StandIn.requests), 2)
+
+    def test_project_downloads_each_url_once_and_patches_files(self):
+        project = self.dir / 'p'
+        project.mkdir()
+        url = self.base + '/a.mp4'
+        (project / 'project.otio').write_text(json.dumps({'tracks': {'children': [
+            {'media_references': {'DEFAULT_MEDIA': {'target_url': url}}}]}}))
+        (project / 'resources.json').write_text(json.dumps({'resources': {'videos': [
+            {'sceneId': 's1', 'results': [{'id': 'r1', 'downloadUrl': url, 'localPath': None}]}]}}, indent=2))
+
+        async def go():
+            client = HttpClient(per_host=2, timeout=5)
+            try:
+                return await process_project(project, Fetcher(client, retries=1, backoff=0))
+            finally:
+                client.close()
+
+        counts = asyncio.run(go())
+        self.assertEqual(counts, {'downloaded': 1, 'cached': 1, 'failed': 0})
+        self.assertEqual(len(StandIn.requests), 1)
+        result = json.loads((project / 'resources.json').read_text())['resources']['videos'][0]['results'][0]
+        self.assertEqual(result['relativePath'], 'videos/r1.mp4')
+        self.assertEqual(result['localPath'], str(project / 'videos' / 'r1.mp4'))
+        self.assertEqual((project / 'resources.json').read_text().count('"localPath"'), 1)
+        otio = json.loads((project / 'project.otio').read_text())
+        self.assertTrue(otio['tracks']['children'][0]['media_references']['DEFAULT_MEDIA']['target_url']
+                        .startswith('videos/remote_'))
+
+        # nothing left to do: the rerun leaves the state file alone
+        mtime = os.stat(project / '.prerender-fetch.json').st_mtime_ns
+        self.assertEqual(asyncio.run(go()), {'downloaded': 0, 'cached': 0, 'failed': 0})
+        self.assertEqual(os.stat(project / '.prerender-fetch.json').st_mtime_ns, mtime)
+
+    def test_resources_saved_during_download_are_replanned(self):
+        project = self.dir / 'p'
+        project.mkdir()
+        url = self.base + '/a.mp4'
+        res_path = project / 'resources.json'
+        res_path.write_text(json.dumps({'resources': {'videos': [
+            {'sceneId': 's1', 'results': [{'id': 'r1', 'downloadUrl': url}]}]}}))
+
+        class SavingFetcher(Fetcher):
+            async def fetch(self, url, dest, state):
+                # the planner saves the file (new content before the result) mid-download
+                res_path.write_text(json.dumps({'title': 'edited in the planner', 'resources': {'videos': [
+                    {'sceneId': 's1', 'results': [{'id': 'r1', 'downloadUrl': url, 'note': 'é'}]}]}}, indent=4))
+                return await super().fetch(url, dest, state)
+
+        async def go():
+            client = HttpClient(per_host=2, timeout=5)
+            try:
+                return await process_project(project, SavingFetcher(client, retries=1, backoff=0))
+            finally:
+                client.close()
+
+        self.assertEqual(asyncio.run(go())['failed'], 0)
+        doc = json.loads(res_path.read_text())
+        self.assertEqual(doc['title'], 'edited in the planner')
+        self.assertEqual(doc['resources']['videos'][0]['results'][0],
+                         {'id': 'r1', 'downloadUrl': url, 'note': 'é',
+                          'localPath': str(project / 'videos' / 'r1.mp4'), 'relativePath': 'videos/r1.mp4'})
+
+    def test_downloads_go_into_the_media_cache(self):
+        cache_dir = self.dir / 'cache'
+
+        async def go(dest):
+            client = HttpClient(per_host=2, timeout=5)
+            cache = MediaCache(cache_dir)
+            try:
+                return await Fetcher(client, retries=1, backoff=0, cache=cache).fetch(
+                    self.base + '/a.mp4', dest, {})
+            finally:
+                client.close()
+                cache.close()
+
+        self.assertEqual(asyncio.run(go(self.dir / 'one.mp4')), 'downloaded')
+        self.assertEqual(asyncio.run(go(self.dir / 'two.mp4')), 'linked')
+        self.assertEqual(len(StandIn.requests), 1)
+        self.assertEqual((self.dir / 'two.mp4').read_bytes(), DATA)
+        self.assertTrue(os.path.samefile(self.dir / 'one.mp4', self.dir / 'two.mp4'))
+        self.assertEqual(list((cache_dir / 'staging').iterdir()), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
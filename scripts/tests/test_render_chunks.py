@@ -0,0 +1,128 @@
+"""Tests for the chunked render orchestrator's plan, locks and checkpoints (scripts/render_chunks.py)."""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import render_chunks  # noqa: E402
+from render_chunks import HOST, RenderJob, chunk_inputs, split_frames  # noqa: E402
+
+
+def clip(name, frames, src):
+    return {'OTIO_SCHEMA': 'Clip.1', 'name': name,
+            'source_range': {'duration': {'value': frames, 'rate': 30}},
+            'media_references': {'DEFAULT_MEDIA': {'target_url': src}}}
+
+
+def manifest(texts, mtime=1):
+    """Two scenes of 60 frames; texts[i] goes into scene i's clip metadata."""
+    items = [{**clip(f's{i}', 60, f'images/{i}.jpg'), 'metadata': {'text': text}} for i, text in enumerate(texts)]
+    return {
+        'fps': 30, 'width': 1080, 'height': 1920, 'durationInFrames': 120,
+        'timeline': {'tracks': {'children': [{'kind': 'Video', 'children': items}]}},
+        'clips': [{'track': 0, 'index': i, 'startFrame': i * 60, 'durationFrames': 60, 'src': f'images/{i}.jpg'}
+                  for i in range(len(texts))],
+        'sources': {'inputs': {'script.json': {'size': 1, 'mtime_ns': mtime}},
+                    'media': {f'images/{i}.jpg': {'size': 10, 'mtime_ns': 1} for i in range(len(texts))}},
+    }
+
+
+class ChunkInputsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.chunks = split_frames(120, 40)  # 0-39, 40-79, 80-119
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def plan(self, m):
+        return {'projectId': 'p', 'composition': 'c', 'frames': 120, 'chunks': self.chunks,
+                'sources': m['sources']}
+
+    def test_only_chunks_covering_a_changed_clip_change(self):
+        before = chunk_inputs(manifest(['a', 'b']), self.chunks)
+        after = chunk_inputs(manifest(['a', 'B']), self.chunks)
+        self.assertEqual([x == y for x, y in zip(before, after)], [True, False, False])
+        self.assertIsNone(chunk_inputs(None, self.chunks))
+
+    def test_changed_sources_invalidate_only_affected_done_chunks(self):
+        job = RenderJob(self.tmp.name)
+        job.load_or_create_plan(self.plan(manifest(['a', 'b'])), manifest(['a', 'b']))
+        for index in range(3):
+            job.mark_done(index, 1.0)
+        self.assertEqual(job.summary()[1]['done'], 3)
+
+        changed = manifest(['a', 'B'], mtime=2)
+        runner = RenderJob(self.tmp.name)
+        runner.load_or_create_plan(self.plan(changed), changed)
+        self.assertEqual(runner.summary()[0], ['done', 'pending', 'pending'])
+        self.assertTrue(job.plan_outdated())  # a runner still on the old plan stops claiming
+        self.assertFalse(runner.plan_outdated())
+
+    def test_plans_without_chunk_hashes_keep_their_done_chunks(self):
+        job = RenderJob(self.tmp.name)
+        job.load_or_create_plan(self.plan({'sources': None}))
+        job.mark_done(0, 1.0)
+        self.assertEqual(job.state(0), 'done')
+
+
+class LockTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.job = RenderJob(self.tmp.name, lock_timeout=60)
+        self.lock = Path(self.tmp.name) / 'x.lock'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_lock(self, host, pid, age=0):
+        self.lock.write_text(json.dumps({'host': host, 'pid': pid, 'started': time.time()}))
+        then = time.time() - age
+        os.utime(self.lock, (then, then))
+
+    def test_stale_when_owner_dead_or_heartbeat_too_old(self):
+        self.write_lock(HOST, os.getppid())
+        self.assertFalse(self.job._is_stale(self.lock))
+        with mock.patch.object(render_chunks, '_pid_alive', return_value=False):
+            self.assertTrue(self.job._is_stale(self.lock))
+        # a live (possibly reused) pid on this host no longer keeps an old lock forever
+        self.write_lock(HOST, os.getppid(), age=120)
+        self.assertTrue(self.job._is_stale(self.lock))
+        self.write_lock('other-host', 1, age=30)
+        self.assertFalse(self.job._is_stale(self.lock))
+        self.write_lock('other-host', 1, age=120)
+        self.assertTrue(self.job._is_stale(self.lock))
+
+    def test_steals_a_stale_lock(self):
+        self.write_lock('other-host', 1, age=120)
+        self.assertTrue(self.job.take_lock(self.lock))
+        self.assertEqual(json.loads(self.lock.read_text())['pid'], os.getpid())
+        self.assertEqual(os.listdir(self.tmp.name), ['x.lock'])
+
+    def test_does_not_steal_a_lock_recreated_after_the_stale_check(self):
+        self.write_lock('other-host', 1, age=120)
+        fresh = json.dumps({'host': 'other-host', 'pid': 2, 'started': time.time()})
+        original = RenderJob._is_stale
+
+        def recreated_meanwhile(job, lock):
+            stale = original(job, lock)
+            # runner A steals and re-creates the lock before our rename
+            lock.unlink()
+            lock.write_text(fresh)
+            return stale
+
+        with mock.patch.object(RenderJob, '_is_stale', recreated_meanwhile):
+            self.assertFalse(self.job.take_lock(self.lock))
+        self.assertEqual(self.lock.read_text(), fresh)
+        self.assertEqual(os.listdir(self.tmp.name), ['x.lock'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""Tests for the image downscale stage (scripts/resize_images.py)."""
+
+import io
+import struct
+import sys
+import tempfile
+import unittest
+import zlib
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import resize_images  # noqa: E402
+from resize_images import Image, fit_within, main  # noqa: E402
+
+
+def png_header(width, height):
+    """Smallest PNG prefix image_info can size (signature + IHDR)."""
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + struct.pack('>I', len(ihdr)) + b'IHDR' + ihdr
+            + struct.pack('>I', zlib.crc32(b'IHDR' + ihdr)))
+
+
+class ResizeTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.projects = Path(self.tmp.name)
+        self.images = self.projects / 'p' / 'images'
+        self.images.mkdir(parents=True)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_main(self, *argv):
+        with redirect_stdout(io.StringIO()):
+            return main(['--projects-dir', str(self.projects), '-j', '1', *argv])
+
+    def test_fit_within_keeps_the_aspect_ratio(self):
+        self.assertEqual(fit_within(8192, 5464, 1920), (1920, 1281))
+        self.assertEqual(fit_within(5464, 8192, 1920), (1281, 1920))
+        self.assertEqual(fit_within(10000, 1, 1920), (1920, 1))
+
+    def test_no_backend_fails_when_oversized_images_remain(self):
+        (self.images / 'big.png').write_bytes(png_header(3000, 2000))
+        with mock.patch.object(resize_images, 'resize_backend', return_value=None):
+            self.assertEqual(self.run_main(), 1)
+        (self.images / 'big.png').write_bytes(png_header(1920, 1080))
+        with mock.patch.object(resize_images, 'resize_backend', return_value=None):
+            self.assertEqual(self.run_main(), 0)
+
+    @unittest.skipIf(Image is None, 'Pillow is not installed')
+    def test_jpeg_draft_uses_the_target_size_and_keeps_the_icc_profile(self):
+        from PIL import ImageCms
+        profile = ImageCms.ImageCmsProfile(ImageCms.createProfile('sRGB')).tobytes()
+        path = self.images / 'wide.jpg'
+        Image.new('RGB', (8192, 5464), (200, 10, 10)).save(path, quality=80, icc_profile=profile)
+
+        drafts = []
+        original = Image.Image.draft
+
+        def spy(img, mode, size):
+            result = original(img, mode, size)
+            drafts.append(img.size)
+            return result
+
+        with mock.patch.object(Image.Image, 'draft', spy):
+            self.assertEqual(self.run_main(), 0)
+        self.assertEqual(drafts, [(2048, 1366)])  # 1/4 scale, not 1/2
+        with Image.open(path) as img:
+            self.assertEqual(img.size, (1920, 1281))
+            self.assertEqual(img.info.get('icc_profile'), profile)
+
+
+if __name__ == '__main__':
+    unittest.main()
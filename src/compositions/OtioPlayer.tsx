@@ -949,6 +949,9 @@ const collectMediaUrls = (timeline: Item, projectId?: string): { videos: string[
     return { videos, audios, images };
 };
 
+// Port of the project event stream served by `generate-project-list.js --watch`
+const PROJECT_WATCH_PORT = (typeof process !== 'undefined' && process.env.REMOTION_PROJECT_WATCH_PORT) || '3124';
+
 export const OtioPlayer: React.FC<OtioPlayerProps> = ({ timeline: defaultTimeline, projectId }) => {
     const { fps } = useVideoConfig(); // Lấy fps từ config của project
 
@@ -1043,15 +1046,43 @@ export const OtioPlayer: React.FC<OtioPlayerProps> = ({ timeline: defaultTimelin
 
         // Polling interval - disabled during rendering to save resources
         let intervalId: ReturnType<typeof setInterval> | null = null;
+        const startPolling = () => {
+            if (!intervalId) intervalId = setInterval(() => load(true), POLLING_INTERVAL);
+        };
+        const stopPolling = () => {
+            if (intervalId) clearInterval(intervalId);
+            intervalId = null;
+        };
+
+        // Push updates from `generate-project-list.js --watch` replace polling
+        // while its event stream is connected; polling resumes if it drops.
+        let events: EventSource | null = null;
         if (!isRendering) {
-            intervalId = setInterval(() => {
-                load(true);
-            }, POLLING_INTERVAL);
+            startPolling();
+            if (typeof EventSource !== 'undefined') {
+                let connected = false;
+                events = new EventSource(`http://localhost:${PROJECT_WATCH_PORT}/events`);
+                events.onopen = () => {
+                    connected = true;
+                    stopPolling();
+                    load(true);
+                };
+                events.onerror = () => {
+                    startPolling();
+                    // No watcher running: stay on polling instead of retrying forever
+                    if (!connected) events?.close();
+                };
+                events.addEventListener('project', (event) => {
+                    const { id } = JSON.parse((event as MessageEvent).data);
+                    if (!projectId || id === projectId) load(true);
+                });
+            }
         }
 
         return () => {
             isMounted = false;
-            if (intervalId) clearInterval(intervalId);
+            stopPolling();
+            events?.close();
         };
     }, [projectId, defaultTimeline, handle]); // Removed activeTimeline from dependencies
 
@@ -1,4 +1,4 @@
-import { staticFile } from 'remotion';
+import { getInputProps, getRemotionEnvironment, staticFile } from 'remotion';
 // @ts-ignore
 import projectsList from '../generated/projects.json';
 import { getAspectRatio, DEFAULT_ASPECT_RATIO } from '../config/aspect-ratios';
@@ -30,6 +30,27 @@ export const loadProject = async (project: ProjectItem, ignoreCache: boolean = f
 
     const cacheBuster = ignoreCache ? `?t=${Date.now()}` : '';
 
+    // Renders that ask for it (render_chunks.py passes useRenderManifest after
+    // refreshing the manifest) load the precompiled scripts/build_manifest.py
+    // output: one small fetch with every media path already resolved, instead
+    // of merging script.json + resources.json + OTIO in every render tab.
+    // Other renders read the live files, so they never see a stale manifest.
+    const useRenderManifest = getRemotionEnvironment().isRendering
+        && (getInputProps() as { useRenderManifest?: boolean }).useRenderManifest === true;
+    if (useRenderManifest && !ignoreCache) {
+        try {
+            const manifestRes = await fetch(`${projectBase}/render-manifest.json`);
+            if (manifestRes.ok) {
+                const manifest = await manifestRes.json();
+                if (manifest?.version === 1 && manifest.timeline) {
+                    return fixOtioPaths(manifest.timeline, projectBase);
+                }
+            }
+        } catch {
+            // fall back to the live project files
+        }
+    }
+
     if (project.hasOtio && project.otioFile) {
         const res = await fetch(`${projectBase}/${project.otioFile}${cacheBuster}`);
         const otio = await res.json();